@@ -1,11 +1,24 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import numpy as np
 from scipy.interpolate import UnivariateSpline
 from scipy.signal import savgol_filter
+from collections import OrderedDict
+import hashlib
 import json
+import os
+import threading
+from process_pool import create_pool, default_workers
 
 app = Flask(__name__)
 
+# Imputation parameters (spline smoothing factor, Savitzky-Golay window cap and order)
+SPLINE_SMOOTHING = 0.5
+SAVGOL_MAX_WINDOW = 51
+SAVGOL_POLYORDER = 2
+
+def savgol_window(n):
+    return min(SAVGOL_MAX_WINDOW, n // 10 * 2 + 1)  # Adaptive window size
+
 def impute_series(series):
     """
     Impute missing values in a single series using spline interpolation and Savitzky-Golay
@@ -28,7 +41,7 @@ def impute_series(series):
     
     # Robust imputation: spline interpolation for smooth trends and periodic patterns
     try:
-        spline = UnivariateSpline(x_known, y_known, s=0.5, k=3)
+        spline = UnivariateSpline(x_known, y_known, s=SPLINE_SMOOTHING, k=3)
         y_imputed = spline(x)
     except Exception:
         # Fallback to linear interpolation if spline fails
@@ -36,8 +49,8 @@ def impute_series(series):
     
     # Apply Savitzky-Golay filter for additional smoothing (handles short-memory dependencies)
     try:
-        window = min(51, n // 10 * 2 + 1)  # Adaptive window size
-        y_imputed = savgol_filter(y_imputed, window_length=window, polyorder=2)
+        window = savgol_window(n)
+        y_imputed = savgol_filter(y_imputed, window_length=window, polyorder=SAVGOL_POLYORDER)
     except Exception:
         pass  # Fallback to spline/linear interpolation if filter fails
     
@@ -53,6 +66,176 @@ def impute_series(series):
     y_imputed = np.where(np.isnan(y_imputed) | np.isinf(y_imputed), np.nanmean(y_known) or 0.0, y_imputed)
     return [round(val, 2) for val in y_imputed]
 
+def impute_rows(matrix):
+    """
+    Run impute_series on every row of a 2-D float array (NaN = missing) and stack the results.
+    """
+    return np.array([impute_series(row) for row in matrix], dtype=np.float64).reshape(np.shape(matrix))
+
+def impute_batch(matrix):
+    """
+    Impute every series of a 2-D float array (NaN = missing) in one vectorized pass.
+    Gaps are filled by linear interpolation between the nearest known neighbours (constant
+    extrapolation at the edges), smoothed with a row-wise Savitzky-Golay filter, then known
+    values are restored, clipped and rounded exactly as impute_series does, so the output
+    carries the same guarantees: no NaNs/Infs, 2 decimal places.
+    """
+    y = np.array(matrix, dtype=np.float64, ndmin=2)
+    m, n = y.shape
+    if n == 0:
+        return y
+    known = ~np.isnan(y)
+    counts = known.sum(axis=1)
+    idx = np.arange(n)
+
+    # Index of the nearest known value at or before / at or after every position
+    prev_idx = np.maximum.accumulate(np.where(known, idx, -1), axis=1)
+    next_idx = np.minimum.accumulate(np.where(known, idx, n)[:, ::-1], axis=1)[:, ::-1]
+    lo = np.where(prev_idx < 0, next_idx, prev_idx).clip(0, n - 1)
+    hi = np.where(next_idx >= n, prev_idx, next_idx).clip(0, n - 1)
+
+    y_zero = np.where(known, y, 0.0)
+    y_lo = np.take_along_axis(y_zero, lo, axis=1)
+    y_hi = np.take_along_axis(y_zero, hi, axis=1)
+    span = hi - lo
+    weight = np.divide(idx - lo, span, out=np.zeros((m, n)), where=span > 0)
+    y_imputed = y_lo + weight * (y_hi - y_lo)
+
+    # Savitzky-Golay smoothing across all rows at once (same adaptive window as impute_series)
+    window = savgol_window(n)
+    if SAVGOL_POLYORDER < window <= n:
+        y_imputed = savgol_filter(y_imputed, window_length=window, polyorder=SAVGOL_POLYORDER, axis=1)
+
+    # Preserve known values
+    y_imputed[known] = y[known]
+
+    # Stability: clip each row to its known range widened by half the range (per rules)
+    y_min = np.where(known, y, np.inf).min(axis=1)
+    y_max = np.where(known, y, -np.inf).max(axis=1)
+    y_range = np.where(y_max != y_min, y_max - y_min, 1.0)
+    sparse = counts < 2
+    y_min[sparse], y_max[sparse], y_range[sparse] = 0.0, 0.0, 0.0
+    y_imputed = np.clip(y_imputed, (y_min - 0.5 * y_range)[:, None], (y_max + 0.5 * y_range)[:, None])
+
+    # Rows with fewer than 2 known points are filled with their mean (0.0 when empty)
+    row_mean = np.divide(y_zero.sum(axis=1), counts, out=np.zeros(m), where=counts > 0)
+    y_imputed[sparse] = row_mean[sparse, None]
+
+    # Ensure no NaNs/Infs and round to 2 decimal places
+    y_imputed = np.where(np.isfinite(y_imputed), y_imputed, row_mean[:, None])
+    return np.round(y_imputed, 2)
+
+# Parallel mode: impute_series fanned out in chunks of series
+IMPUTE_WORKERS = int(os.environ.get('BLANKETY_WORKERS', default_workers()))
+IMPUTE_CHUNK_SIZE = int(os.environ.get('BLANKETY_CHUNK_SIZE', 8))
+PARALLEL_MIN_SERIES = int(os.environ.get('BLANKETY_PARALLEL_MIN_SERIES', 16))
+impute_pool = create_pool(IMPUTE_WORKERS)
+
+def impute_parallel(matrix):
+    """
+    Impute rows with impute_series on the shared process pool. Executor.map keeps results in
+    input order. Small payloads (or a disabled pool) run serially, where IPC would dominate.
+    """
+    if impute_pool is None or len(matrix) < PARALLEL_MIN_SERIES:
+        return impute_rows(matrix)
+    rows = impute_pool.map(impute_series, matrix, chunksize=IMPUTE_CHUNK_SIZE)
+    return np.array(list(rows), dtype=np.float64).reshape(np.shape(matrix))
+
+# Imputation strategies: each takes a 2-D float array (NaN = missing) and returns the imputed array
+IMPUTERS = {
+    'series': impute_rows,
+    'batch': impute_batch,
+    'parallel': impute_parallel,
+}
+DEFAULT_STRATEGY = os.environ.get('BLANKETY_STRATEGY', 'batch')
+
+class ImputationCache:
+    """
+    In-process LRU cache of imputed series, keyed by a hash of the raw values plus the
+    strategy and imputation parameters, and bounded by the bytes of the cached arrays.
+    """
+    ENTRY_OVERHEAD = 128  # Approximate per-entry bookkeeping (key, dict slot, array header)
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(row, strategy):
+        n = len(row)
+        digest = hashlib.blake2b(row.tobytes(), digest_size=16)
+        digest.update(repr((strategy, n, SPLINE_SMOOTHING, savgol_window(n), SAVGOL_POLYORDER)).encode())
+        return digest.digest()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = value.nbytes + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        value.setflags(write=False)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes + self.ENTRY_OVERHEAD
+            self.entries[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes + self.ENTRY_OVERHEAD
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'maxBytes': self.max_bytes,
+            }
+
+CACHE_MAX_BYTES = int(os.environ.get('BLANKETY_CACHE_BYTES', 64 * 1024 * 1024))
+result_cache = ImputationCache(CACHE_MAX_BYTES) if CACHE_MAX_BYTES > 0 else None
+
+def impute_matrix(matrix, strategy=DEFAULT_STRATEGY):
+    """
+    Impute a 2-D float array (NaN = missing) with the given strategy, serving rows seen before
+    from result_cache and running the strategy only on the rows that miss.
+    """
+    imputer = IMPUTERS[strategy]
+    if result_cache is None:
+        return imputer(matrix)
+    keys = [result_cache.key(row, strategy) for row in matrix]
+    result = np.empty(np.shape(matrix), dtype=np.float64)
+    missing = []
+    for i, key in enumerate(keys):
+        cached = result_cache.get(key)
+        if cached is None:
+            missing.append(i)
+        else:
+            result[i] = cached
+    if missing:
+        computed = imputer(matrix[missing])
+        result[missing] = computed
+        for i, row in zip(missing, computed):
+            result_cache.put(keys[i], row.copy())
+    return result
+
 def validate_input(data):
     """
     Validate input: 100 series, 1000 elements each, elements are float or null (per rules).
@@ -94,24 +277,89 @@ def validate_output(result):
     except Exception as e:
         return False, f"Output validation error: {str(e)}"
 
+def load_series_matrix(body, expected_shape=(100, 1000)):
+    """
+    Decode a raw {"series": [...]} request body straight into a contiguous float64 matrix,
+    with nulls mapped to NaN by NumPy's C-level conversion. Raises TypeError for non-numeric
+    elements and ValueError for a bad structure/shape; the per-series scan in validate_input
+    only runs to word the error message.
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict) or 'series' not in data:
+        raise ValueError("Invalid input: 'series' key missing")
+    # A well-formed body's only string is the "series" key. Without other quotes there is
+    # nothing NumPy could coerce from text, so the direct float conversion is safe.
+    if body.count(b'"') == 2:
+        try:
+            matrix = np.array(data['series'], dtype=np.float64)
+        except (TypeError, ValueError):
+            matrix = None
+        if matrix is not None and matrix.shape == expected_shape:
+            return matrix
+
+    is_valid, message = validate_input(data)
+    if not is_valid:
+        raise (TypeError if 'non-numeric' in message else ValueError)(message)
+    return np.array(data['series'], dtype=np.float64)
+
+def load_series_row(line):
+    """
+    Decode one NDJSON line (a JSON array of float or null) into a 1-D float64 array with
+    nulls as NaN. Raises TypeError for non-numeric elements, ValueError for anything that is
+    not a non-empty flat array.
+    """
+    values = json.loads(line)
+    if not isinstance(values, list) or not values:
+        raise ValueError("Expected a non-empty JSON array of float or null")
+    if b'"' in line:
+        raise TypeError("Contains non-numeric or non-null values")
+    try:
+        row = np.array(values, dtype=np.float64)
+    except TypeError:
+        raise TypeError("Contains non-numeric or non-null values")
+    except ValueError:
+        raise ValueError("Expected a flat array of float or null")
+    if row.ndim != 1:
+        raise ValueError("Expected a flat array of float or null")
+    return row
+
+def validate_output_matrix(matrix, expected_shape=(100, 1000)):
+    """
+    Validate an imputed matrix with array-wide checks: expected shape, all values finite.
+    """
+    if matrix.shape != expected_shape:
+        return False, f"Expected shape {expected_shape}, got {matrix.shape}"
+    if not np.isfinite(matrix).all():
+        return False, "Output contains NaNs or Infs"
+    return True, "Output validation passed"
+
+def generate_test_series(n_series=100, length=1000, null_fraction=0.2, trend=0.5, amplitude=0.2,
+                         period=50, noise=0.05, seed=42):
+    """
+    Generate synthetic series in memory: linear trend + sinusoidal component + Gaussian noise,
+    rounded to 2 decimal places (per rules). Returns (truth, observed) float arrays of shape
+    (n_series, length), where observed has null_fraction of each series set to NaN.
+    """
+    rng = np.random.RandomState(seed)
+    t = np.arange(length)
+    n_nulls = int(round(null_fraction * length))
+    truth = np.empty((n_series, length))
+    observed = np.empty((n_series, length))
+    for i in range(n_series):
+        s = trend * t / length + amplitude * np.sin(2 * np.pi * t / period) + rng.normal(0, noise, length)
+        truth[i] = np.round(s, 2)
+        observed[i] = truth[i]
+        observed[i, rng.choice(length, n_nulls, replace=False)] = np.nan
+    return truth, observed
+
 def generate_test_input(filename):
     """
     Generate test input with 100 series of 1000 elements, 20% nulls, with trends, periodic
     components, and noise (per rules). Save to filename.
     """
-    np.random.seed(42)
-    series = []
-    for _ in range(100):
-        t = np.arange(1000)
-        # Linear trend + sinusoidal component + noise
-        s = 0.5 * t / 1000 + 0.2 * np.sin(2 * np.pi * t / 50) + np.random.normal(0, 0.05, 1000)
-        s = np.round(s, 2)  # Round to 2 decimal places
-        # Set 20% of elements to null
-        null_indices = np.random.choice(1000, 200, replace=False)
-        s[null_indices] = np.nan
-        # Convert nans to None for JSON
-        s = [None if np.isnan(x) else x for x in s]
-        series.append(s)
+    _, observed = generate_test_series()
+    # Convert nans to None for JSON
+    series = [[None if np.isnan(x) else x for x in s] for s in observed.tolist()]
     
     test_input = {"series": series}
     with open(filename, 'w') as f:
@@ -182,29 +430,67 @@ def blankety():
     Flask endpoint to process JSON input and return imputed series.
     Input: {"series": [[float or null, ...], ...]} (100 series, 1000 elements each).
     Output: {"answer": [[float, ...], ...]} (100 series, 1000 elements, no nulls).
+    The imputation strategy defaults to BLANKETY_STRATEGY and can be overridden with ?strategy=.
     """
     try:
-        data = request.get_json()
-        is_valid_input, input_message = validate_input(data)
-        if not is_valid_input:
-            return jsonify({'error': input_message}), 400
+        strategy = request.args.get('strategy', DEFAULT_STRATEGY)
+        if strategy not in IMPUTERS:
+            return jsonify({'error': f"Unknown strategy '{strategy}', expected one of {sorted(IMPUTERS)}"}), 400
         
-        result = []
-        for series in data['series']:
-            series_np = [np.nan if x is None else x for x in series]
-            imputed_series = impute_series(series_np)
-            result.append(imputed_series)
+        try:
+            matrix = load_series_matrix(request.get_data(cache=False))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
         
-        output = {"answer": result}
-        is_valid_output, output_message = validate_output(output)
+        result = impute_matrix(matrix, strategy)
+        
+        is_valid_output, output_message = validate_output_matrix(result)
         if not is_valid_output:
             return jsonify({'error': output_message}), 500
         
-        return jsonify(output)
+        return jsonify({"answer": result.tolist()})
     
     except Exception as e:
         return jsonify({'error': f'Processing error: {str(e)}'}), 500
 
+@app.route('/blankety/stream', methods=['POST'])
+def blankety_stream():
+    """
+    Streaming variant of /blankety for arbitrarily many series of any length.
+    Input: NDJSON, one series per line ([float or null, ...]).
+    Output: NDJSON, one imputed series per input line, written as soon as it is computed.
+    A bad line produces a final {"error": ..., "line": n} record and ends the stream.
+    """
+    strategy = request.args.get('strategy', DEFAULT_STRATEGY)
+    if strategy not in IMPUTERS:
+        return jsonify({'error': f"Unknown strategy '{strategy}', expected one of {sorted(IMPUTERS)}"}), 400
+
+    def generate():
+        for line_no, line in enumerate(request.stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = load_series_row(line)
+                imputed = impute_matrix(row[None, :], strategy)
+                is_valid_output, output_message = validate_output_matrix(imputed, row[None, :].shape)
+                if not is_valid_output:
+                    raise ValueError(output_message)
+            except Exception as e:
+                yield json.dumps({'error': f'Line {line_no}: {str(e)}', 'line': line_no}) + '\n'
+                return
+            yield json.dumps(imputed[0].tolist()) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/blankety/cache', methods=['GET'])
+def blankety_cache():
+    """
+    Report imputation cache counters (hits, misses, evictions, size) for sizing BLANKETY_CACHE_BYTES.
+    """
+    if result_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **result_cache.stats()})
+
 if __name__ == '__main__':
     print("Starting Blankety Blanks server...")
     input_file = "test_input.json"
@@ -1,5 +1,8 @@
 from flask import Flask, request, jsonify
-from typing import List, Tuple
+from typing import List, Tuple, Optional
+from array import array
+import os
+import time
 
 app = Flask(__name__)
 
@@ -47,6 +50,77 @@ def calculate_time(intel: List[List[int]], reserve: int, fronts: int, stamina: i
     
     return total_time
 
+def validate_item(item) -> Optional[str]:
+    """
+    Validate one scenario the way the endpoint always has; returns the error message of the
+    first problem found, or None when the item is valid.
+    """
+    if not all(key in item for key in ['intel', 'reserve', 'fronts', 'stamina']):
+        return "Missing required fields"
+    
+    reserve = item['reserve']
+    fronts = item['fronts']
+    for attack in item['intel']:
+        if len(attack) != 2:
+            return "Each intel item must have exactly 2 values"
+        if not (1 <= attack[0] <= fronts):
+            return f"Front must be between 1 and {fronts}"
+        if not (1 <= attack[1] <= reserve):
+            return f"MP consumption must be between 1 and {reserve}"
+    return None
+
+# Schedules the endpoint can compute: calculate_time's greedy pass or the provably minimal one
+SOLVERS = ('greedy', 'optimal')
+DEFAULT_SOLVER = os.environ.get('MAGES_GAMBIT_SOLVER', 'greedy')
+# Wall-clock budget for the optimal solver per request; items not solved in time keep the greedy time
+SOLVER_BUDGET_MS = float(os.environ.get('MAGES_GAMBIT_SOLVER_BUDGET_MS', 1000))
+
+def calculate_optimal_time(intel: List[List[int]], reserve: int, stamina: int, deadline: Optional[float] = None) -> Optional[int]:
+    """
+    The minimum total time over all schedules, where Klein may also cool down before mana or
+    stamina run out. Returns None when the deadline (a time.perf_counter value) passes first,
+    or when stamina < 1 leaves no schedule but calculate_time's.
+
+    Between two cooldowns mana and stamina only go down, by the same amounts whether an attack
+    is extended or launched, so a stretch of attacks fits between cooldowns iff its MP sum is at
+    most reserve and its length at most stamina, and then every same-front attack in it extends.
+    The time is therefore 10 per front change plus, per stretch, 20 (launch and cooldown) or 10
+    when the stretch starts on a front change anyway. best[k] is the minimum over stretches
+    ending at attack k, taken over a sliding window of start positions kept in a monotone queue.
+    """
+    n = len(intel)
+    if stamina < 1:
+        return None
+    fronts = [attack[0] for attack in intel]
+    mps = [attack[1] for attack in intel]
+    changes = sum(fronts[i] != fronts[i - 1] for i in range(1, n))
+    
+    # start_cost[j]: best time up to attack j plus the cost of starting a stretch at j
+    best = array('q', bytes(8 * (n + 1)))
+    start_cost = array('q', bytes(8 * (n + 1)))
+    queue = array('q', bytes(8 * (n + 1)))  # stretch starts, increasing start_cost
+    head = tail = 0
+    lo = spent = 0
+    for k in range(1, n + 1):
+        if deadline is not None and not k & 4095 and time.perf_counter() > deadline:
+            return None
+        j = k - 1
+        start_cost[j] = best[j] + (10 if j and fronts[j] != fronts[j - 1] else 20)
+        while tail > head and start_cost[queue[tail - 1]] >= start_cost[j]:
+            tail -= 1
+        queue[tail] = j
+        tail += 1
+        
+        spent += mps[j]
+        while spent > reserve or k - lo > stamina:
+            spent -= mps[lo]
+            lo += 1
+        while queue[head] < lo:
+            head += 1
+        best[k] = start_cost[queue[head]]
+    
+    return best[n] + 10 * changes if n else 10
+
 @app.route('/the-mages-gambit', methods=['POST'])
 def the_mages_gambit():
     try:
@@ -55,30 +129,33 @@ def the_mages_gambit():
         if not isinstance(data, list):
             return jsonify({"error": "Expected a list of inputs"}), 400
         
-        results = []
+        solver = request.args.get('solver', DEFAULT_SOLVER)
+        if solver not in SOLVERS:
+            return jsonify({"error": f"Unknown solver '{solver}', expected one of {list(SOLVERS)}"}), 400
+        budget_ms = float(request.args.get('budget_ms', SOLVER_BUDGET_MS))
         
+        # Validate every item before simulating any of them
         for item in data:
-            # Validate input
-            if not all(key in item for key in ['intel', 'reserve', 'fronts', 'stamina']):
-                return jsonify({"error": "Missing required fields"}), 400
-            
-            intel = item['intel']
-            reserve = item['reserve']
-            fronts = item['fronts']
-            stamina = item['stamina']
-            
-            # Validate intel data
-            for attack in intel:
-                if len(attack) != 2:
-                    return jsonify({"error": "Each intel item must have exactly 2 values"}), 400
-                if not (1 <= attack[0] <= fronts):
-                    return jsonify({"error": f"Front must be between 1 and {fronts}"}), 400
-                if not (1 <= attack[1] <= reserve):
-                    return jsonify({"error": f"MP consumption must be between 1 and {reserve}"}), 400
-            
-            time = calculate_time(intel, reserve, fronts, stamina)
-            results.append({"time": time})
+            error = validate_item(item)
+            if error:
+                return jsonify({"error": error}), 400
+        
+        times = [calculate_time(item['intel'], item['reserve'], item['fronts'], item['stamina']) for item in data]
         
+        if solver == 'greedy':
+            return jsonify([{"time": time} for time in times])
+        
+        # Greedy times stand in for items the optimal solver cannot finish within the budget
+        deadline = time.perf_counter() + budget_ms / 1000
+        results = []
+        for item, greedy_time in zip(data, times):
+            optimal_time = None
+            if time.perf_counter() < deadline:
+                optimal_time = calculate_optimal_time(item['intel'], item['reserve'], item['stamina'], deadline)
+            if optimal_time is None:
+                results.append({"time": greedy_time, "solver": "greedy"})
+            else:
+                results.append({"time": optimal_time, "solver": "optimal"})
         return jsonify(results)
     
     except Exception as e:
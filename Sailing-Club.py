@@ -1,6 +1,7 @@
 from flask import Flask, request, jsonify, Response
-from typing import List
+from typing import List, Optional, Tuple
 import json
+import numpy as np
 
 app = Flask(__name__)
 
@@ -54,6 +55,38 @@ def min_boats_needed(intervals: List[List[int]]) -> int:
     
     return max_boats
 
+def interval_engine(intervals) -> Optional[Tuple[List[List[int]], int]]:
+    """
+    Parts 1 and 2 at once on integer arrays, with the same results as merge_intervals and
+    min_boats_needed. Starts are sorted once (skipped when already sorted) and ends once:
+    the running maximum of the ends in start order closes a busy period wherever the next
+    start lies beyond it, and the boats in use just after the i-th start are i + 1 minus the
+    ends at or before it. Returns None when the input is not a list of [start, end] integer
+    pairs with end >= start, which goes through the original functions instead.
+    """
+    try:
+        array = np.array(intervals)
+    except (TypeError, ValueError):
+        return None
+    if array.ndim != 2 or array.shape[1] != 2 or len(array) == 0 or array.dtype.kind not in 'iu':
+        return None
+    starts, ends = array[:, 0], array[:, 1]
+    if (ends < starts).any():
+        return None
+    
+    if not (starts[1:] >= starts[:-1]).all():
+        order = np.argsort(starts, kind='stable')
+        starts, ends = starts[order], ends[order]
+    
+    reach = np.maximum.accumulate(ends)
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] > reach[:-1])))
+    last = np.append(first[1:] - 1, len(starts) - 1)
+    merged = np.stack((starts[first], reach[last]), axis=1).tolist()
+    
+    ends_closed = np.searchsorted(np.sort(ends), starts, side='right')
+    in_use = np.arange(1, len(starts) + 1) - ends_closed
+    return merged, max(0, int(in_use.max()))
+
 @app.route('/sailing-club/submission', methods=['POST'])
 def sailing_club():
     try:
@@ -66,11 +99,15 @@ def sailing_club():
             case_id = test_case['id']
             intervals = test_case['input']
             
-            # Part 1: Merge intervals
-            merged_slots = merge_intervals(intervals)
-            
-            # Part 2: Find minimum boats needed
-            min_boats = min_boats_needed(intervals)
+            result = interval_engine(intervals)
+            if result is not None:
+                merged_slots, min_boats = result
+            else:
+                # Part 1: Merge intervals
+                merged_slots = merge_intervals(intervals)
+                
+                # Part 2: Find minimum boats needed
+                min_boats = min_boats_needed(intervals)
             
             # Create solution dictionary with ordered entries
             solution = [
@@ -1,80 +1,402 @@
-from collections import defaultdict
+from array import array
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
+import threading
+import time
+from process_pool import create_pool, default_workers
+from session_store import SessionStore
 
 app = Flask(__name__)
 CORS(app)
 
-def find_extra_channels(network):
-    graph = defaultdict(list)
-    edges = []
-    spy_set = set()
-    
+def intern_network(network):
+    """
+    Map spy names to dense integer ids in order of first appearance.
+    Returns (names, spy1 ids, spy2 ids), with one id pair per connection.
+    """
+    ids = {}
+    heads = array('i')
+    tails = array('i')
     for connection in network:
-        spy1, spy2 = connection['spy1'], connection['spy2']
-        graph[spy1].append(spy2)
-        graph[spy2].append(spy1)
-        edges.append((spy1, spy2))
-        spy_set.update([spy1, spy2])
+        heads.append(ids.setdefault(connection['spy1'], len(ids)))
+        tails.append(ids.setdefault(connection['spy2'], len(ids)))
+    return list(ids), heads, tails
+
+def build_csr(n, heads, tails):
+    """
+    Build a CSR adjacency over n interned spies: the neighbours of spy u are
+    neighbors[offsets[u]:offsets[u + 1]], and edge_ids holds the connection index of each
+    slot. Self-connections are left out.
+    """
+    offsets = array('q', bytes(8 * (n + 1)))
+    for u, v in zip(heads, tails):
+        if u != v:
+            offsets[u + 1] += 1
+            offsets[v + 1] += 1
+    for u in range(n):
+        offsets[u + 1] += offsets[u]
     
-    visited = set()
-    parent = {}
-    cycle_edges = set()
+    neighbors = array('i', bytes(4 * offsets[n]))
+    edge_ids = array('i', bytes(4 * offsets[n]))
+    fill = offsets[:-1]
+    for edge_id, (u, v) in enumerate(zip(heads, tails)):
+        if u != v:
+            neighbors[fill[u]] = v
+            edge_ids[fill[u]] = edge_id
+            fill[u] += 1
+            neighbors[fill[v]] = u
+            edge_ids[fill[v]] = edge_id
+            fill[v] += 1
+    return offsets, neighbors, edge_ids
+
+def find_cycle_edges(n, heads, tails):
+    """
+    Mark every connection that lies on some cycle, i.e. every connection that is not a bridge.
+    Uses an iterative Tarjan bridge search over the CSR adjacency: one DFS, linear in spies +
+    connections, no recursion. Returns a bytearray flag per connection.
+    """
+    offsets, neighbors, edge_ids = build_csr(n, heads, tails)
+    # A spy connected to themselves is a cycle on its own
+    on_cycle = bytearray(u == v for u, v in zip(heads, tails))
     
-    def dfs(node, par):
-        visited.add(node)
-        parent[node] = par
-        
-        for neighbor in graph[node]:
-            if neighbor == par:
+    disc = array('i', [-1]) * n
+    low = array('i', bytes(4 * n))
+    parent_edge = array('i', [-1]) * n
+    cursor = offsets[:-1]
+    counter = 0
+    
+    for root in range(n):
+        if disc[root] >= 0:
+            continue
+        disc[root] = low[root] = counter
+        counter += 1
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            pos, end = cursor[node], offsets[node + 1]
+            while pos < end:
+                neighbor, edge_id = neighbors[pos], edge_ids[pos]
+                pos += 1
+                if edge_id == parent_edge[node]:
+                    continue
+                if disc[neighbor] >= 0:
+                    # Back edge: always closes a cycle
+                    on_cycle[edge_id] = 1
+                    if disc[neighbor] < low[node]:
+                        low[node] = disc[neighbor]
+                else:
+                    disc[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    parent_edge[neighbor] = edge_id
+                    stack.append(neighbor)
+                    break
+            cursor[node] = pos
+            if stack[-1] != node:
                 continue
-            if neighbor in visited:
-                cycle_nodes = set()
-                current = node
-                while current != neighbor:
-                    cycle_nodes.add(current)
-                    current = parent[current]
-                cycle_nodes.add(neighbor)
-                
-                for edge in edges:
-                    u, v = edge
-                    if u in cycle_nodes and v in cycle_nodes:
-                        cycle_edges.add((min(u, v), max(u, v)))
-            else:
-                dfs(neighbor, node)
+            stack.pop()
+            if stack:
+                parent = stack[-1]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+                # Tree edge is a bridge only if the subtree cannot reach above its parent
+                if low[node] <= disc[parent]:
+                    on_cycle[parent_edge[node]] = 1
     
-    for spy in spy_set:
-        if spy not in visited:
-            dfs(spy, None)
+    return on_cycle
+
+def find_extra_channels(network):
+    """
+    Return every connection that lies on some cycle as {"spy1", "spy2"}, with the two names
+    in sorted order and in input order. Spy names are interned to integer ids once; the
+    search runs on compact integer arrays and names are only looked up again for the output.
+    """
+    names, heads, tails = intern_network(network)
+    on_cycle = find_cycle_edges(len(names), heads, tails)
     
+    n = len(names)
     extra_channels = []
-    for edge in cycle_edges:
-        u, v = edge
-        extra_channels.append({"spy1": u, "spy2": v})
+    seen = set()
+    for u, v, cyclic in zip(heads, tails, on_cycle):
+        if not cyclic:
+            continue
+        key = u * n + v if u < v else v * n + u
+        if key in seen:
+            continue
+        seen.add(key)
+        spy1, spy2 = names[u], names[v]
+        extra_channels.append({"spy1": min(spy1, spy2), "spy2": max(spy1, spy2)})
     
     return extra_channels
 
+# Parallel investigation: networks fanned out in bundles of connections
+INVESTIGATE_WORKERS = int(os.environ.get('INVESTIGATE_WORKERS', default_workers()))
+INVESTIGATE_BUNDLE_SIZE = int(os.environ.get('INVESTIGATE_BUNDLE_SIZE', 5000))
+INVESTIGATE_PARALLEL_MIN_CONNECTIONS = int(os.environ.get('INVESTIGATE_PARALLEL_MIN_CONNECTIONS', 20000))
+investigate_pool = create_pool(INVESTIGATE_WORKERS)
+
+def investigate_bundle(networks):
+    """
+    Run find_extra_channels on each network of a bundle, returning (extra_channels, elapsed_ms) pairs.
+    """
+    results = []
+    for network in networks:
+        start = time.perf_counter()
+        extra_channels = find_extra_channels(network)
+        results.append((extra_channels, (time.perf_counter() - start) * 1000))
+    return results
+
+def schedule_networks(sizes, bundle_size):
+    """
+    Group network indices into work bundles, largest first (LPT scheduling) so a huge network
+    starts immediately instead of queueing behind small ones. Networks of at least bundle_size
+    connections get a bundle of their own; smaller ones are packed together up to bundle_size
+    to amortise inter-process overhead.
+    """
+    bundles = []
+    current, current_size = [], 0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        if sizes[i] >= bundle_size:
+            bundles.append([i])
+            continue
+        if current and current_size + sizes[i] > bundle_size:
+            bundles.append(current)
+            current, current_size = [], 0
+        current.append(i)
+        current_size += sizes[i]
+    if current:
+        bundles.append(current)
+    return bundles
+
+def investigate_networks(networks):
+    """
+    Investigate all networks, in parallel when the pool is enabled and the batch is big enough.
+    Returns (extra_channels, elapsed_ms) per network, in input order.
+    """
+    sizes = [len(network) for network in networks]
+    if investigate_pool is None or len(networks) < 2 or sum(sizes) < INVESTIGATE_PARALLEL_MIN_CONNECTIONS:
+        return investigate_bundle(networks)
+    
+    results = [None] * len(networks)
+    bundles = schedule_networks(sizes, INVESTIGATE_BUNDLE_SIZE)
+    futures = [investigate_pool.submit(investigate_bundle, [networks[i] for i in bundle]) for bundle in bundles]
+    for bundle, future in zip(bundles, futures):
+        for i, result in zip(bundle, future.result()):
+            results[i] = result
+    return results
+
 @app.route('/investigate', methods=['POST'])
 def investigate():
+    """
+    Find the extra channels of every network. With "debug": true (or ?debug=1) each network
+    also reports its connection count and processing time.
+    """
     data = request.get_json()
     networks = data.get('networks', [])
+    debug = bool(data.get('debug')) or request.args.get('debug') in ('1', 'true')
+    
+    results = investigate_networks([network_data['network'] for network_data in networks])
     
     result_networks = []
     
-    for network_data in networks:
-        network_id = network_data['networkId']
-        network_connections = network_data['network']
-        
-        extra_channels = find_extra_channels(network_connections)
-        
-        result_networks.append({
-            "networkId": network_id,
+    for network_data, (extra_channels, elapsed_ms) in zip(networks, results):
+        result = {
+            "networkId": network_data['networkId'],
             "extraChannels": extra_channels
-        })
+        }
+        if debug:
+            result["debug"] = {
+                "connections": len(network_data['network']),
+                "elapsedMs": round(elapsed_ms, 3)
+            }
+        result_networks.append(result)
     
     return jsonify({"networks": result_networks})
 
+class NetworkSession:
+    """
+    A spy network that grows over time, with its extra channels maintained incrementally.
+    Union-find over 2-edge-connected components plus a forest of bridges between them (the
+    online bridge-finding scheme): a connection inside a component is a cycle edge, a
+    connection joining two trees becomes a bridge, and a connection between two components of
+    the same tree turns the bridges on the tree path between them into cycle edges and merges
+    those components. Each connection costs amortised O(log n).
+    """
+
+    def __init__(self, network_id=None):
+        self.network_id = network_id
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.names = []
+        self.par_2ecc = []      # union-find over 2-edge-connected components
+        self.par_cc = []        # union-find over connected components (valid on 2ECC leaders)
+        self.cc_size = []
+        self.link = []          # bridge-forest parent of a 2ECC leader, -1 at a root
+        self.link_edge = []     # connection id of the bridge to that parent
+        self.last_visit = []
+        self.lca_iteration = 0
+        self.connections = 0
+        self.edge_pairs = []     # sorted spy-id pair of every connection
+        self.pair_first_id = {}  # (spy1 id, spy2 id) sorted -> first connection id joining them
+        self.cyclic_pairs = {}   # pairs with at least one connection on a cycle
+
+    def spy_id(self, name):
+        spy = self.ids.get(name)
+        if spy is None:
+            spy = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.par_2ecc.append(spy)
+            self.par_cc.append(spy)
+            self.cc_size.append(1)
+            self.link.append(-1)
+            self.link_edge.append(-1)
+            self.last_visit.append(0)
+        return spy
+
+    def find_2ecc(self, v):
+        if v == -1:
+            return -1
+        par = self.par_2ecc
+        root = v
+        while par[root] != root:
+            root = par[root]
+        while par[v] != root:
+            par[v], v = root, par[v]
+        return root
+
+    def find_cc(self, v):
+        v = self.find_2ecc(v)
+        par = self.par_cc
+        root = v
+        while par[root] != root:
+            root = par[root]
+        while par[v] != root:
+            par[v], v = root, par[v]
+        return root
+
+    def make_root(self, v):
+        # Re-root v's bridge tree at v, reversing the parent links (and their bridge ids)
+        v = self.find_2ecc(v)
+        root, child, child_edge = v, -1, -1
+        while v != -1:
+            parent, parent_edge = self.find_2ecc(self.link[v]), self.link_edge[v]
+            self.link[v], self.link_edge[v] = child, child_edge
+            self.par_cc[v] = root
+            child, child_edge, v = v, parent_edge, parent
+        self.cc_size[root] = self.cc_size[child]
+
+    def mark_cycle_edge(self, edge_id):
+        self.cyclic_pairs.setdefault(self.edge_pairs[edge_id], None)
+
+    def merge_path(self, a, b):
+        # Walk both tree paths up to their lowest common ancestor, then fold every component
+        # on the way into it; the bridges walked over now lie on a cycle
+        self.lca_iteration += 1
+        path_a, path_b = [], []
+        lca = -1
+        while lca == -1:
+            if a != -1:
+                a = self.find_2ecc(a)
+                path_a.append(a)
+                if self.last_visit[a] == self.lca_iteration:
+                    lca = a
+                    break
+                self.last_visit[a] = self.lca_iteration
+                a = self.link[a]
+            if b != -1:
+                b = self.find_2ecc(b)
+                path_b.append(b)
+                if self.last_visit[b] == self.lca_iteration:
+                    lca = b
+                    break
+                self.last_visit[b] = self.lca_iteration
+                b = self.link[b]
+        for path in (path_a, path_b):
+            for v in path:
+                self.par_2ecc[v] = lca
+                if v == lca:
+                    break
+                self.mark_cycle_edge(self.link_edge[v])
+
+    def add_connections(self, network):
+        """
+        Append connections ({"spy1", "spy2"} dicts) to the network.
+        """
+        with self.lock:
+            for connection in network:
+                u, v = self.spy_id(connection['spy1']), self.spy_id(connection['spy2'])
+                edge_id = self.connections
+                self.connections += 1
+                pair = (u, v) if u < v else (v, u)
+                self.pair_first_id.setdefault(pair, edge_id)
+                self.edge_pairs.append(pair)
+                a, b = self.find_2ecc(u), self.find_2ecc(v)
+                if a == b:
+                    self.mark_cycle_edge(edge_id)
+                    continue
+                ca, cb = self.find_cc(a), self.find_cc(b)
+                if ca != cb:
+                    # New bridge: hang the smaller tree below the other one
+                    if self.cc_size[ca] > self.cc_size[cb]:
+                        a, b, ca, cb = b, a, cb, ca
+                    self.make_root(a)
+                    self.link[a] = self.par_cc[a] = b
+                    self.link_edge[a] = edge_id
+                    self.cc_size[cb] += self.cc_size[a]
+                else:
+                    self.mark_cycle_edge(edge_id)
+                    self.merge_path(a, b)
+
+    def extra_channels(self):
+        """
+        Current extra channels, in the same form and order as find_extra_channels.
+        """
+        with self.lock:
+            pairs = sorted(self.cyclic_pairs, key=self.pair_first_id.__getitem__)
+            extra_channels = []
+            for u, v in pairs:
+                spy1, spy2 = self.names[u], self.names[v]
+                extra_channels.append({"spy1": min(spy1, spy2), "spy2": max(spy1, spy2)})
+            return extra_channels
+
+INVESTIGATE_MAX_SESSIONS = int(os.environ.get('INVESTIGATE_MAX_SESSIONS', 1000))
+INVESTIGATE_SESSION_TTL_S = float(os.environ.get('INVESTIGATE_SESSION_TTL_S', 3600))
+sessions = SessionStore(INVESTIGATE_MAX_SESSIONS, INVESTIGATE_SESSION_TTL_S)
+sessions.add_delete_route(app, '/investigate/sessions/<session_id>')
+
+@app.route('/investigate/sessions', methods=['POST'])
+def create_session():
+    """
+    Start an incremental investigation. Body (optional): {"networkId": ..., "network": [...]}.
+    """
+    data = request.get_json(silent=True) or {}
+    session = NetworkSession(data.get('networkId'))
+    session.add_connections(data.get('network', []))
+    session_id = sessions.add(session)
+    return jsonify({"sessionId": session_id, "networkId": session.network_id, "connections": session.connections}), 201
+
+@app.route('/investigate/sessions/<session_id>/connections', methods=['POST'])
+def add_session_connections(session_id):
+    """
+    Append a batch of connections: {"network": [{"spy1": ..., "spy2": ...}, ...]}.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": f"Unknown session '{session_id}'"}), 404
+    network = (request.get_json() or {}).get('network', [])
+    session.add_connections(network)
+    return jsonify({"sessionId": session_id, "added": len(network), "connections": session.connections})
+
+@app.route('/investigate/sessions/<session_id>', methods=['GET'])
+def get_session_channels(session_id):
+    """
+    Current extra channels of a session, shaped like one entry of /investigate.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": f"Unknown session '{session_id}'"}), 404
+    return jsonify({"sessionId": session_id, "networkId": session.network_id, "extraChannels": session.extra_channels()})
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port)
@@ -1,16 +1,57 @@
 from flask import Flask, request, jsonify
+from functools import lru_cache
 import re
 import os  
 
 app = Flask(__name__)
 
+ROMAN_MAP = {'I':1,'V':5,'X':10,'L':50,'C':100,'D':500,'M':1000}
+ENGLISH_WORDS = {'zero':0,'one':1,'two':2,'three':3,'four':4,'five':5,'six':6,'seven':7,'eight':8,'nine':9,'ten':10,'eleven':11,'twelve':12,'thirteen':13,'fourteen':14,'fifteen':15,'sixteen':16,'seventeen':17,'eighteen':18,'nineteen':19,'twenty':20,'thirty':30,'forty':40,'fifty':50,'sixty':60,'seventy':70,'eighty':80,'ninety':90,'hundred':100,'thousand':1000,'million':1000000}
+GERMAN_WORDS = {'null':0,'eins':1,'zwei':2,'drei':3,'vier':4,'fünf':5,'sechs':6,'sieben':7,'acht':8,'neun':9,'zehn':10,'elf':11,'zwölf':12,'dreizehn':13,'vierzehn':14,'fünfzehn':15,'sechzehn':16,'siebzehn':17,'achtzehn':18,'neunzehn':19,'zwanzig':20,'dreißig':30,'vierzig':40,'fünfzig':50,'sechzig':60,'siebzig':70,'achtzig':80,'neunzig':90,'hundert':100,'tausend':1000,'million':1000000}
+CHINESE_DIGITS = {'零':0,'〇':0,'一':1,'二':2,'三':3,'四':4,'五':5,'六':6,'七':7,'八':8,'九':9,'十':10,'百':100,'千':1000,'万':10000,'億':100000000,'亿':100000000}
+LANGUAGE_ORDER = ['roman','english','traditional_chinese','simplified_chinese','german','arabic']
+LANGUAGE_RANK = {lang: rank for rank, lang in enumerate(LANGUAGE_ORDER)}
+TOKEN_CACHE_SIZE = int(os.environ.get('DUOLINGO_TOKEN_CACHE_SIZE', 65536))
+
+def compile_word_trie(words):
+    """
+    Compile words into one regex shaped like their prefix trie, so a single search() scan
+    tells whether any of the words occurs in a text.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def pattern(node):
+        branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A word ending here means the rest of the branch is optional
+        return '(?:' + body + ')?' if '' in node else body
+
+    return re.compile(pattern(trie))
+
+ARABIC_RE = re.compile(r'^\d+$')
+ROMAN_RE = re.compile(r'^[IVXLCDM]+$')
+ENGLISH_RE = compile_word_trie(ENGLISH_WORDS)
+GERMAN_RE = compile_word_trie(GERMAN_WORDS)
+CHINESE_RE = re.compile('[' + ''.join(map(re.escape, CHINESE_DIGITS)) + ']')
+
 class DuolingoSorter:
+    roman_map = ROMAN_MAP
+    english_words = ENGLISH_WORDS
+    german_words = GERMAN_WORDS
+    chinese_digits = CHINESE_DIGITS
+    language_order = LANGUAGE_ORDER
+
     def __init__(self):
-        self.roman_map = {'I':1,'V':5,'X':10,'L':50,'C':100,'D':500,'M':1000}
-        self.english_words = {'zero':0,'one':1,'two':2,'three':3,'four':4,'five':5,'six':6,'seven':7,'eight':8,'nine':9,'ten':10,'eleven':11,'twelve':12,'thirteen':13,'fourteen':14,'fifteen':15,'sixteen':16,'seventeen':17,'eighteen':18,'nineteen':19,'twenty':20,'thirty':30,'forty':40,'fifty':50,'sixty':60,'seventy':70,'eighty':80,'ninety':90,'hundred':100,'thousand':1000,'million':1000000}
-        self.german_words = {'null':0,'eins':1,'zwei':2,'drei':3,'vier':4,'fünf':5,'sechs':6,'sieben':7,'acht':8,'neun':9,'zehn':10,'elf':11,'zwölf':12,'dreizehn':13,'vierzehn':14,'fünfzehn':15,'sechzehn':16,'siebzehn':17,'achtzehn':18,'neunzehn':19,'zwanzig':20,'dreißig':30,'vierzig':40,'fünfzig':50,'sechzig':60,'siebzig':70,'achtzig':80,'neunzig':90,'hundert':100,'tausend':1000,'million':1000000}
-        self.chinese_digits = {'零':0,'〇':0,'一':1,'二':2,'三':3,'四':4,'五':5,'六':6,'七':7,'八':8,'九':9,'十':10,'百':100,'千':1000,'万':10000,'億':100000000,'亿':100000000}
-        self.language_order = ['roman','english','traditional_chinese','simplified_chinese','german','arabic']
+        # Bounded token -> (value, language) memo; lists repeat the same tokens a lot
+        self.parse_token = lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._parse_token)
+        self.part_one_value = lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._part_one_value)
 
     def roman_to_int(self, s):
         total, prev = 0, 0
@@ -50,16 +91,23 @@ class DuolingoSorter:
         return total + current * last_mult
 
     def detect_language(self, text):
-        if re.match(r'^\d+$', text): return 'arabic'
-        if re.match(r'^[IVXLCDM]+$', text.upper()): return 'roman'
-        if any(word in text.lower() for word in self.english_words): return 'english'
-        if any(word in text.lower() for word in self.german_words): return 'german'
-        if any(char in text for char in self.chinese_digits):
+        if ARABIC_RE.match(text): return 'arabic'
+        if ROMAN_RE.match(text.upper()): return 'roman'
+        lowered = text.lower()
+        if ENGLISH_RE.search(lowered): return 'english'
+        if GERMAN_RE.search(lowered): return 'german'
+        if CHINESE_RE.search(text):
             return 'traditional_chinese' if '億' in text else 'simplified_chinese'
         return 'unknown'
 
-    def convert_to_number(self, text):
+    def _parse_token(self, text):
         lang = self.detect_language(text)
+        return self.number_in_language(text, lang), lang
+
+    def convert_to_number(self, text):
+        return self.parse_token(text)[0]
+
+    def number_in_language(self, text, lang):
         if lang == 'arabic': return int(text)
         if lang == 'roman': return self.roman_to_int(text.upper())
         if lang == 'english': return self.parse_word_number(text, self.english_words)
@@ -67,24 +115,48 @@ class DuolingoSorter:
         if lang in ['traditional_chinese','simplified_chinese']: return self.parse_chinese_number(text)
         return int(text) if text.isdigit() else 0
 
+    def _part_one_value(self, text):
+        return self.roman_to_int(text) if text.isalpha() else int(text)
+
     def sort_part_one(self, lst):
-        return [str(self.roman_to_int(x) if x.isalpha() else int(x)) for x in sorted(lst, key=lambda x: self.roman_to_int(x) if x.isalpha() else int(x))]
+        # Each key is computed once; indices are sorted and the output reuses the keys
+        values = [self.part_one_value(x) for x in lst]
+        order = sorted(range(len(values)), key=values.__getitem__)
+        return [str(values[i]) for i in order]
 
     def sort_part_two(self, lst):
-        items = []
+        values, ranks = [], []
         for item in lst:
-            num_val = self.convert_to_number(item)
-            lang = self.detect_language(item)
-            lang_prio = self.language_order.index(lang) if lang in self.language_order else 999
-            items.append((num_val, lang_prio, item))
-        return [x[2] for x in sorted(items, key=lambda x: (x[0], x[1]))]
+            num_val, lang = self.parse_token(item)
+            values.append(num_val)
+            ranks.append(LANGUAGE_RANK.get(lang, 999))
+        # Two stable index sorts (language rank, then value) order by (value, rank) without
+        # building a tuple per item
+        order = sorted(range(len(values)), key=ranks.__getitem__)
+        order.sort(key=values.__getitem__)
+        return [lst[i] for i in order]
+
+    def sort_many(self, part, lists):
+        """
+        Sort many lists in one call. Repeated tokens across the lists share the parse caches.
+        """
+        sort_one = self.sort_part_one if part == "ONE" else self.sort_part_two
+        return [sort_one(lst) for lst in lists]
+
+sorter = DuolingoSorter()
 
 @app.route('/duolingo-sort', methods=['POST'])
 def handle_request():
     data = request.get_json()
     part = data.get('part')
-    unsorted_list = data.get('challengeInput', {}).get('unsortedList', [])
-    sorter = DuolingoSorter()
+    challenge_input = data.get('challengeInput', {})
+    unsorted_list = challenge_input.get('unsortedList', [])
+    
+    # Bulk mode: many lists per request, answered in the same order
+    if 'unsortedLists' in challenge_input:
+        if part not in ("ONE", "TWO"):
+            return jsonify({'error': 'Invalid part'}), 400
+        return jsonify({'sortedLists': sorter.sort_many(part, challenge_input['unsortedLists'])})
     
     if part == "ONE":
         sorted_list = sorter.sort_part_one(unsorted_list)
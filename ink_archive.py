@@ -1,118 +1,372 @@
 from flask import Flask, request, jsonify
 import math
 import os
+import threading
+import time
+import numpy as np
+from session_store import SessionStore
 
 app = Flask(__name__)
 
+def neg_log(rates):
+    """
+    -math.log of each rate. np.log can differ from math.log in the last bit, and near-ties
+    between paths then resolve differently from the scalar code.
+    """
+    return [-math.log(rate) for rate in rates.tolist()]
+
+def trade_weights(rates):
+    """
+    -log(rate) matrix of a trade graph, inf where there is no trade. Every positive rate off the
+    diagonal is an edge, including rate 1.0 (weight 0).
+    """
+    rates = np.asarray(rates, dtype=np.float64)
+    edges = rates > 0
+    np.fill_diagonal(edges, False)
+    weights = np.full(rates.shape, np.inf)
+    weights[edges] = neg_log(rates[edges])
+    return weights
+
+def predecessor_cycle(predecessor):
+    """
+    A node on a cycle of the predecessor graph (-1 = no predecessor), or None if there is none.
+    """
+    n = len(predecessor)
+    state = [0] * n  # 0 unvisited, 1 on the current walk, 2 finished
+    for v in range(n):
+        path = []
+        while v != -1 and state[v] == 0:
+            state[v] = 1
+            path.append(v)
+            v = predecessor[v]
+        if v != -1 and state[v] == 1:
+            return v
+        for u in path:
+            state[u] = 2
+    return None
+
 def find_cycle(goods, rates):
+    """
+    Bellman-Ford from goods[0] over the -log(rate) graph, each round one min-plus product of the
+    distance vector with the weight matrix. Stops as soon as a round improves nothing (no
+    arbitrage reachable), or once the predecessor graph closes a cycle after n - 1 rounds; that
+    cycle is negative, i.e. profitable. Returns (goods along the cycle, gain).
+    """
     n = len(goods)
-    graph = [[0] * n for _ in range(n)]
-    
-    for i in range(n):
-        for j in range(n):
-            if i != j and rates[i][j] > 0:
-                graph[i][j] = -math.log(rates[i][j])
+    if n == 0:
+        return None, 0.0
+    weights = trade_weights(rates)
+    columns = np.arange(n)
     
-    distance = [float('inf')] * n
-    predecessor = [-1] * n
+    distance = np.full(n, np.inf)
     distance[0] = 0
+    predecessor = np.full(n, -1, dtype=np.int64)
     
-    for _ in range(n - 1):
-        for u in range(n):
-            for v in range(n):
-                if graph[u][v] != 0 and distance[u] + graph[u][v] < distance[v]:
-                    distance[v] = distance[u] + graph[u][v]
-                    predecessor[v] = u
+    rounds = 0
+    while True:
+        candidates = distance[:, None] + weights
+        best_u = candidates.argmin(axis=0)
+        best = candidates[best_u, columns]
+        improved = best < distance
+        if not improved.any():
+            return None, 0.0
+        distance[improved] = best[improved]
+        predecessor[improved] = best_u[improved]
+        rounds += 1
+        if rounds >= n - 1:
+            start = predecessor_cycle(predecessor.tolist())
+            if start is not None:
+                break
     
-    for u in range(n):
-        for v in range(n):
-            if graph[u][v] != 0 and distance[u] + graph[u][v] < distance[v]:
-                cur = u
-                for _ in range(n):
-                    cur = predecessor[cur]
-                
-                start = cur
-                cycle_nodes = []
-                while True:
-                    cycle_nodes.append(cur)
-                    cur = predecessor[cur]
-                    if cur == start and len(cycle_nodes) > 1:
-                        break
-                
-                cycle_nodes.reverse()
-                cycle = [goods[i] for i in cycle_nodes]
-                product = 1.0
-                for i in range(len(cycle_nodes)):
-                    u_idx = goods.index(cycle[i])
-                    v_idx = goods.index(cycle[(i + 1) % len(cycle_nodes)])
-                    product *= rates[u_idx][v_idx]
-                
-                return cycle, product - 1.0
+    predecessor = predecessor.tolist()
+    cycle_nodes = [start]
+    cur = predecessor[start]
+    while cur != start:
+        cycle_nodes.append(cur)
+        cur = predecessor[cur]
+    cycle_nodes.reverse()
     
-    return None, 0.0
-
-def find_best_cycle(goods, rates):
-    n = len(goods)
-    best_cycle = None
-    best_gain = 0.0
+    product = 1.0
+    for i in range(len(cycle_nodes)):
+        product *= rates[cycle_nodes[i]][cycle_nodes[(i + 1) % len(cycle_nodes)]]
     
-    for start in range(n):
-        log_rates = [[0.0] * n for _ in range(n)]
+    return [goods[i] for i in cycle_nodes], product - 1.0
+
+def closure_weights(rates):
+    """
+    -log(rate) for every positive rate, diagonal included, inf where there is no trade: the
+    starting distances of find_arbitrage_cycles' Floyd-Warshall pass.
+    """
+    weights = np.full(rates.shape, np.inf)
+    trades = rates > 0
+    weights[trades] = neg_log(rates[trades])
+    return weights
+
+def floyd_warshall(weights):
+    """
+    All-pairs distances and next hops, each k step a whole-matrix min-plus update. The updates
+    reproduce the classic in-place loop exactly, including once dist[k][k] is negative: row k
+    then improves on itself while it is being read, rows above k see its old values and rows
+    below k its new ones, and each row reuses its own updated dist[i][k] past column k. The
+    next hops that collect_cycles reads back are therefore the ones the loop would leave.
+    """
+    n = len(weights)
+    dist = weights.copy()
+    next_node = np.where(dist < np.inf, np.arange(n), -1)
+    for k in range(n):
+        if not dist[k, k] < 0:
+            # Row and column k cannot change in this step, so the order of updates is moot
+            via = dist[:, k, None] + dist[None, k, :]
+            better = via < dist
+            np.copyto(dist, via, where=better)
+            np.copyto(next_node, np.broadcast_to(next_node[:, k, None], (n, n)), where=better)
+            continue
         
-        for i in range(n):
-            for j in range(n):
-                if rates[i][j] > 0:
-                    log_rates[i][j] = -math.log(rates[i][j])
-                else:
-                    log_rates[i][j] = float('inf')
+        # Row k against itself: dist[k][k] doubles at column k, later columns see the new value
+        dkk = dist[k, k]
+        old_row = dist[k].copy()
+        new_kk = dkk + dkk if dkk + dkk < dkk else dkk
+        via = dkk + old_row
+        via[k + 1:] = new_kk + old_row[k + 1:]
+        better = via < old_row
+        dist[k, better] = via[better]
+        next_node[k, better] = next_node[k, k]
+        new_row = dist[k].copy()
+        
+        # Every other row i: dist[i][k] improves (through the cycle at k) only after columns < k
+        others = np.flatnonzero(np.arange(n) != k)
+        source = np.where((others < k)[:, None], old_row[None, :], new_row[None, :])
+        source_kk = np.where(others < k, old_row[k], new_row[k])
+        to_k = dist[others, k].copy()
+        hops = next_node[others, k]
+        block_dist = dist[others]
+        block_next = next_node[others]
+        
+        via = to_k[:, None] + source[:, :k]
+        better = via < block_dist[:, :k]
+        np.copyto(block_dist[:, :k], via, where=better)
+        np.copyto(block_next[:, :k], np.broadcast_to(hops[:, None], better.shape), where=better)
         
-        dist = [[0.0] * n for _ in range(n)]
-        next_node = [[-1] * n for _ in range(n)]
+        via_kk = to_k + source_kk
+        to_k = np.where(via_kk < to_k, via_kk, to_k)
+        block_dist[:, k] = to_k
         
-        for i in range(n):
-            for j in range(n):
-                dist[i][j] = log_rates[i][j]
-                if log_rates[i][j] < float('inf'):
-                    next_node[i][j] = j
+        via = to_k[:, None] + source[:, k + 1:]
+        better = via < block_dist[:, k + 1:]
+        np.copyto(block_dist[:, k + 1:], via, where=better)
+        np.copyto(block_next[:, k + 1:], np.broadcast_to(hops[:, None], better.shape), where=better)
         
-        for k in range(n):
-            for i in range(n):
-                for j in range(n):
-                    if dist[i][k] + dist[k][j] < dist[i][j]:
-                        dist[i][j] = dist[i][k] + dist[k][j]
-                        next_node[i][j] = next_node[i][k]
+        dist[others] = block_dist
+        next_node[others] = block_next
+    return dist, next_node
+
+def find_arbitrage_cycles(goods, rates):
+    """
+    Every distinct profitable cycle found by one Floyd-Warshall pass over the -log(rate) graph,
+    as (closed path of goods, gain) pairs ranked by gain, best first.
+    """
+    n = len(goods)
+    if n == 0:
+        return []
+    rates = np.asarray(rates, dtype=np.float64)
+    dist, next_node = floyd_warshall(closure_weights(rates))
+    return collect_cycles(goods, rates, dist, next_node)
+
+def collect_cycles(goods, rates, dist, next_node):
+    """
+    Read back a cycle through i along next_node[.][i] for every i whose dist[i][i] is negative,
+    priced on rates; rotations of one cycle count once. Ranked by gain, best first.
+    """
+    next_node = next_node.tolist()
+    rates = rates.tolist()
+    cycles = {}
+    for i in np.flatnonzero(np.diagonal(dist) < 0).tolist():
+        cur = i
+        visited = set()
+        while cur not in visited:
+            visited.add(cur)
+            cur = next_node[cur][i]
+        
+        start = cur
+        cycle_nodes = [start]
+        next_val = next_node[start][i]
+        while next_val != start:
+            cycle_nodes.append(next_val)
+            next_val = next_node[next_val][i]
+        cycle_nodes.append(start)
+        
+        product = 1.0
+        for j in range(len(cycle_nodes) - 1):
+            product *= rates[cycle_nodes[j]][cycle_nodes[j + 1]]
+        gain = product - 1.0
+        if gain <= 0:
+            continue
+        
+        # Same cycle from another starting good: keep the rotation with the best product
+        lowest = cycle_nodes.index(min(cycle_nodes[:-1]))
+        key = tuple(cycle_nodes[lowest:-1] + cycle_nodes[:lowest])
+        if key not in cycles or gain > cycles[key][1]:
+            cycles[key] = ([goods[idx] for idx in cycle_nodes], gain, i)
+    
+    # Equal gains rank by the good they were read back from, so the best is the cycle a
+    # strictly-greater scan over the goods would keep
+    ranked = sorted(cycles.values(), key=lambda cycle: (-cycle[1], cycle[2]))
+    return [(path, gain) for path, gain, _ in ranked]
+
+def find_best_cycle(goods, rates):
+    cycles = find_arbitrage_cycles(goods, rates)
+    if not cycles:
+        return None, 0.0
+    return cycles[0]
+
+# Wall-clock budget per request for maxLength searches; past it the best cycle found so far is
+# returned and reported as not proven optimal
+SEARCH_BUDGET_MS = float(os.environ.get('INK_ARCHIVE_SEARCH_BUDGET_MS', 2000))
+# Rows of the walk DP handled per max-plus block, bounding the block to rows x n x n floats
+WALK_DP_BLOCK_ELEMENTS = 1 << 22
+# Longest cycle a maxLength search may look for (after capping at the number of goods); the
+# walk DP keeps one n x n layer of predecessors per trade
+MAX_CYCLE_LENGTH = int(os.environ.get('INK_ARCHIVE_MAX_LENGTH', 64))
+
+def is_positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+class SearchTimeout(Exception):
+    pass
+
+def split_closed_walk(walk):
+    """
+    Split a closed walk (nodes in order, the last trading back to the first) into the simple
+    cycles it is made of.
+    """
+    stack, position = [], {}
+    for v in walk + walk[:1]:
+        if v in position:
+            start = position[v]
+            yield stack[start:]
+            for u in stack[start + 1:]:
+                del position[u]
+            del stack[start + 1:]
+        else:
+            position[v] = len(stack)
+            stack.append(v)
+
+def find_max_gain_cycle(goods, rates, max_length, deadline=None):
+    """
+    The most profitable trade cycle of at most max_length trades, as (closed path, gain,
+    optimal). optimal is False when the deadline (a time.perf_counter value) cut the search
+    short and the cycle is only the best found.
+
+    A layered max-plus DP over walk lengths first finds the best closed walks of each length;
+    the simple cycles they split into seed the incumbent. A depth-first search then enumerates
+    cycles by their lowest-index good s, pruning any path whose log-rate so far plus the best
+    walk back to s in the trades left cannot beat the incumbent.
+    """
+    n = len(goods)
+    max_length = min(max_length, n)
+    if max_length < 2:
+        return None, 0.0, True
+    logs = -trade_weights(rates)  # log(rate), -inf where there is no trade
+    log_rows = logs.tolist()
+    best_nodes, best_log = None, 0.0  # only cycles with a product above 1 count
+    
+    def consider(nodes):
+        nonlocal best_nodes, best_log
+        total = sum(log_rows[u][v] for u, v in zip(nodes, nodes[1:] + nodes[:1]))
+        if total > best_log:
+            best_nodes, best_log = list(nodes), total
+    
+    def check_deadline():
+        if deadline is not None and time.perf_counter() > deadline:
+            raise SearchTimeout
+    
+    try:
+        # walk[i][j]: best log-rate of a k-trade walk from i to j; preds[k - 2][i][j] the good
+        # before j on it
+        walk = logs
+        preds = []
+        pred_dtype = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+        block = max(1, WALK_DP_BLOCK_ELEMENTS // (n * n))
+        for k in range(2, max_length + 1):
+            check_deadline()
+            step = np.empty((n, n))
+            pred = np.empty((n, n), dtype=pred_dtype)
+            for row in range(0, n, block):
+                candidates = walk[row:row + block, :, None] + logs[None, :, :]
+                pred[row:row + block] = candidates.argmax(axis=1)
+                step[row:row + block] = np.take_along_axis(candidates, pred[row:row + block, None, :], axis=1)[:, 0, :]
+            preds.append(pred)
+            walk = step
+            for i in np.flatnonzero(np.diagonal(walk) > best_log).tolist():
+                nodes, cur = [i], i
+                for m in range(k, 1, -1):
+                    cur = int(preds[m - 2][i, cur])
+                    nodes.append(cur)
+                for cycle in split_closed_walk(nodes[::-1]):
+                    consider(cycle)
         
-        for i in range(n):
-            if dist[i][i] < 0:
-                cycle = []
-                cur = i
-                visited = set()
-                while cur not in visited:
-                    visited.add(cur)
-                    cur = next_node[cur][i]
-                
-                start = cur
-                cycle_nodes = [start]
-                next_val = next_node[start][i]
-                
-                while next_val != start:
-                    cycle_nodes.append(next_val)
-                    next_val = next_node[next_val][i]
-                
-                cycle_nodes.append(start)
-                
-                product = 1.0
-                for j in range(len(cycle_nodes) - 1):
-                    u = cycle_nodes[j]
-                    v = cycle_nodes[j + 1]
-                    product *= rates[u][v]
-                
-                gain = product - 1.0
-                if gain > best_gain:
-                    best_gain = gain
-                    best_cycle = [goods[idx] for idx in cycle_nodes]
+        for s in range(n - 1):
+            check_deadline()
+            # to_start[r][v]: upper bound on the log-rate of getting from good s + 1 + v back to
+            # s in at most r trades through goods above s (best walk, so revisits are allowed)
+            sub = logs[s + 1:, s + 1:]
+            to_start = [None, logs[s + 1:, s]]
+            for _ in range(2, max_length):
+                prev = to_start[-1]
+                to_start.append(np.maximum(prev, (sub + prev[None, :]).max(axis=1)))
+            
+            path = [s]
+            on_path = {s}
+            
+            def expand(v, total):
+                """
+                Score closing the cycle at v (the end of path), then return the goods worth
+                trading to next, most promising first, with their log-rates and bounds.
+                """
+                nonlocal best_nodes, best_log
+                check_deadline()
+                if len(path) > 1 and total + log_rows[v][s] > best_log:
+                    best_nodes, best_log = list(path), total + log_rows[v][s]
+                left = max_length - len(path)  # trades left after the next one
+                if left < 1:
+                    return None
+                reach = logs[v, s + 1:] + total
+                bounds = reach + to_start[left]
+                candidates = np.flatnonzero(bounds > best_log)
+                # Most promising first, so the incumbent improves early and prunes more
+                order = candidates[np.argsort(-bounds[candidates], kind='stable')].tolist()
+                return iter(order), reach, bounds
+            
+            # One frame per good on the path past s, popped once its candidates run out
+            frames = [expand(s, 0.0)]
+            while frames:
+                order, reach, bounds = frames[-1]
+                for u in order:
+                    good = s + 1 + u
+                    if good not in on_path and bounds[u] > best_log:
+                        break
+                else:
+                    frames.pop()
+                    if frames:
+                        on_path.discard(path.pop())
+                    continue
+                path.append(good)
+                on_path.add(good)
+                frame = expand(good, float(reach[u]))
+                if frame is None:
+                    on_path.discard(path.pop())
+                else:
+                    frames.append(frame)
+        optimal = True
+    except SearchTimeout:
+        optimal = False
     
-    return best_cycle, best_gain
+    if best_nodes is None:
+        return None, 0.0, optimal
+    product = 1.0
+    for u, v in zip(best_nodes, best_nodes[1:] + best_nodes[:1]):
+        product *= rates[u][v]
+    return [goods[i] for i in best_nodes + best_nodes[:1]], product - 1.0, optimal
 
 @app.route('/The-Ink-Archive', methods=['POST'])
 def solve():
@@ -120,29 +374,200 @@ def solve():
     challenges = data.get('challenges', [])
     
     results = []
+    deadline = time.perf_counter() + SEARCH_BUDGET_MS / 1000
     
     for challenge in challenges:
         goods = challenge.get('goods', [])
         rates = challenge.get('rates', [])
+        top_k = challenge.get('topK')
+        max_length = challenge.get('maxLength')
+        optimal = None
+        
+        if top_k is not None and not is_positive_int(top_k):
+            return jsonify({'error': 'topK must be a positive integer'}), 400
         
-        if len(challenges) == 1:
+        ranked = None
+        if max_length is not None:
+            if not is_positive_int(max_length):
+                return jsonify({'error': 'maxLength must be a positive integer'}), 400
+            if min(max_length, len(goods)) > MAX_CYCLE_LENGTH:
+                return jsonify({'error': f'maxLength is limited to {MAX_CYCLE_LENGTH} trades'}), 400
+            cycle, gain, optimal = find_max_gain_cycle(goods, rates, max_length, deadline)
+        elif len(challenges) == 1:
             cycle, gain = find_cycle(goods, rates)
         else:
-            cycle, gain = find_best_cycle(goods, rates)
+            ranked = find_arbitrage_cycles(goods, rates)
+            cycle, gain = ranked[0] if ranked else (None, 0.0)
         
         if cycle:
-            results.append({
+            result = {
                 'path': cycle,
                 'gain': gain * 100
-            })
+            }
         else:
-            results.append({
+            result = {
                 'path': [],
                 'gain': 0.0
-            })
+            }
+        if optimal is not None:
+            # Whether the maxLength search finished, proving the cycle the most profitable
+            result['optimal'] = optimal
+        if top_k is not None:
+            # The top_k most profitable distinct cycles, best first
+            if ranked is None:
+                ranked = find_arbitrage_cycles(goods, rates)
+            result['cycles'] = [{'path': path, 'gain': cycle_gain * 100} for path, cycle_gain in ranked[:top_k]]
+        results.append(result)
     
     return jsonify(results)
 
+# Rounding slack for session distances, which add up the same paths in a different order than
+# a fresh pass: trades within it of a shortest path count as on it, and cycles within it of
+# break-even as possibly profitable
+SESSION_TOLERANCE = 1e-9
+
+class MarketSession:
+    """
+    A goods universe whose rates change a few at a time, with the Floyd-Warshall state of
+    find_arbitrage_cycles kept up to date while there is no arbitrage. dist then holds true
+    shortest paths: a rate going up (a trade getting cheaper) is folded in as a rank-1 min-plus
+    update over the paths through that trade, O(n^2), and a rate going down only matters when
+    the trade lies on some shortest path. Any change that can bring in arbitrage, and every
+    change while there is some, marks the session dirty instead: under arbitrage dist is the
+    in-place pass's read-back state rather than shortest paths, so the next query rebuilds it
+    with a fresh pass. Ranked cycles are cached between updates.
+    """
+
+    def __init__(self, goods, rates):
+        self.lock = threading.Lock()
+        self.goods = list(goods)
+        self.index = {good: i for i, good in enumerate(self.goods)}
+        self.rates = np.array(rates, dtype=np.float64).reshape(len(self.goods), len(self.goods))
+        self.weights = closure_weights(self.rates)
+        self.updates = 0
+        self.recomputes = 0
+        self.dirty = True
+        self.cycles = None
+
+    def paths_through(self, u, v):
+        """
+        Distances from every good to u and from v to every good for routing through trade
+        (u, v), with the first hop of the paths to u. A path may also start at u or end at v.
+        """
+        to_u = self.dist[:, u].copy()
+        first_hop = self.next_node[:, u].copy()
+        to_u[u] = 0.0
+        first_hop[u] = v
+        from_v = self.dist[v, :].copy()
+        from_v[v] = 0.0
+        return to_u, first_hop, from_v
+
+    def update_rates(self, updates):
+        """
+        Apply (from index, to index, rate) updates.
+        """
+        with self.lock:
+            for u, v, rate in updates:
+                old_weight = self.weights[u, v]
+                new_weight = -math.log(rate) if rate > 0 else math.inf
+                self.rates[u, v] = rate
+                self.weights[u, v] = new_weight
+                self.updates += 1
+                self.cycles = None
+                if self.dirty or new_weight == old_weight:
+                    continue
+                if (np.diagonal(self.dist) < 0).any():
+                    self.dirty = True
+                    continue
+                to_u, first_hop, from_v = self.paths_through(u, v)
+                if new_weight < old_weight:
+                    via = to_u[:, None] + new_weight + from_v[None, :]
+                    better = via < self.dist
+                    if (np.diagonal(via)[np.diagonal(better)] <= SESSION_TOLERANCE).any():
+                        # A cycle through the trade is now (nearly) profitable
+                        self.dirty = True
+                    elif better.any():
+                        np.copyto(self.dist, via, where=better)
+                        np.copyto(self.next_node, np.broadcast_to(first_hop[:, None], better.shape), where=better)
+                else:
+                    via = to_u[:, None] + old_weight + from_v[None, :]
+                    if (np.isfinite(via) & (via <= self.dist + SESSION_TOLERANCE)).any():
+                        self.dirty = True
+
+    def best_cycles(self):
+        """
+        Current profitable cycles as (closed path, gain), best first.
+        """
+        with self.lock:
+            if self.dirty:
+                self.dist, self.next_node = floyd_warshall(self.weights)
+                self.recomputes += 1
+                self.dirty = False
+                self.cycles = None
+            if self.cycles is None:
+                self.cycles = collect_cycles(self.goods, self.rates, self.dist, self.next_node) if self.goods else []
+            return self.cycles
+
+INK_ARCHIVE_MAX_SESSIONS = int(os.environ.get('INK_ARCHIVE_MAX_SESSIONS', 1000))
+INK_ARCHIVE_SESSION_TTL_S = float(os.environ.get('INK_ARCHIVE_SESSION_TTL_S', 3600))
+sessions = SessionStore(INK_ARCHIVE_MAX_SESSIONS, INK_ARCHIVE_SESSION_TTL_S)
+sessions.add_delete_route(app, '/The-Ink-Archive/sessions/<session_id>')
+
+def session_result(session_id, session, top_k=None):
+    cycles = session.best_cycles()
+    result = {'sessionId': session_id, 'path': [], 'gain': 0.0}
+    if cycles:
+        result['path'], gain = cycles[0]
+        result['gain'] = gain * 100
+    if top_k is not None:
+        result['cycles'] = [{'path': path, 'gain': gain * 100} for path, gain in cycles[:top_k]]
+    return result
+
+@app.route('/The-Ink-Archive/sessions', methods=['POST'])
+def create_market_session():
+    """
+    Load a goods universe once: {"goods": [...], "rates": [[...], ...]}. Responds with the
+    session id and the current best cycle.
+    """
+    data = request.get_json()
+    session = MarketSession(data.get('goods', []), data.get('rates', []))
+    session_id = sessions.add(session)
+    return jsonify(session_result(session_id, session)), 201
+
+@app.route('/The-Ink-Archive/sessions/<session_id>/rates', methods=['POST'])
+def update_market_rates(session_id):
+    """
+    Apply sparse rate changes: {"updates": [{"from": good, "to": good, "rate": ...}, ...]}.
+    Either every update applies or, on an unknown good, none does.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f"Unknown session '{session_id}'"}), 404
+    updates = []
+    for update in (request.get_json() or {}).get('updates', []):
+        for key in ('from', 'to'):
+            if update[key] not in session.index:
+                return jsonify({'error': f"Unknown good '{update[key]}'"}), 400
+        updates.append((session.index[update['from']], session.index[update['to']], float(update['rate'])))
+    session.update_rates(updates)
+    return jsonify({'sessionId': session_id, 'updated': len(updates), 'dirty': session.dirty})
+
+@app.route('/The-Ink-Archive/sessions/<session_id>', methods=['GET'])
+def get_market_session(session_id):
+    """
+    Current best cycle of a session, shaped like one entry of /The-Ink-Archive (?topK= adds the
+    ranked cycles).
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f"Unknown session '{session_id}'"}), 404
+    top_k = request.args.get('topK')
+    if top_k is not None:
+        top_k = int(top_k) if top_k.isdecimal() else 0
+        if not is_positive_int(top_k):
+            return jsonify({'error': 'topK must be a positive integer'}), 400
+    return jsonify(session_result(session_id, session, top_k))
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port)
@@ -1,6 +1,11 @@
 from flask import Flask, request, jsonify
+from functools import lru_cache
+from operator import itemgetter
+from string import ascii_lowercase, ascii_uppercase
 import re
 import os
+import numpy as np
+from process_pool import create_pool, default_workers
 
 app = Flask(__name__)
 
@@ -62,22 +67,119 @@ def reverse_double_consonants(x):
         i += 1
     return ''.join(result)
 
-def solve_challenge_one(transformations, transformed_word):
-    reverse_funcs = {
-        'mirror_words(x)': reverse_mirror_words,
-        'encode_mirror_alphabet(x)': reverse_encode_mirror_alphabet,
-        'toggle_case(x)': reverse_toggle_case,
-        'swap_pairs(x)': reverse_swap_pairs,
-        'encode_index_parity(x)': reverse_encode_index_parity,
-        'double_consonants(x)': reverse_double_consonants
-    }
+REVERSE_FUNCS = {
+    'mirror_words(x)': reverse_mirror_words,
+    'encode_mirror_alphabet(x)': reverse_encode_mirror_alphabet,
+    'toggle_case(x)': reverse_toggle_case,
+    'swap_pairs(x)': reverse_swap_pairs,
+    'encode_index_parity(x)': reverse_encode_index_parity,
+    'double_consonants(x)': reverse_double_consonants
+}
+
+# Inverses that map every character on its own, as str.translate tables (exact on ASCII text)
+CHAR_MAP_TABLES = {
+    'encode_mirror_alphabet(x)': str.maketrans(ascii_lowercase + ascii_uppercase,
+                                               ascii_lowercase[::-1] + ascii_uppercase[::-1]),
+    'toggle_case(x)': str.maketrans(ascii_lowercase + ascii_uppercase, ascii_uppercase + ascii_lowercase),
+}
+
+# Inverses that reorder the characters of every word: the source index of each output position,
+# for a word of length n
+WORD_PERMUTATIONS = {
+    'mirror_words(x)': lambda n: range(n - 1, -1, -1),
+    'swap_pairs(x)': lambda n: [k ^ 1 if k ^ 1 < n else k for k in range(n)],
+    'encode_index_parity(x)': lambda n: [k // 2 if k % 2 == 0 else (n + 1) // 2 + k // 2 for k in range(n)],
+}
+
+PIPELINE_CACHE_SIZE = int(os.environ.get('SAFEGUARD_PIPELINE_CACHE_SIZE', 256))
+
+class FusedStage:
+    """
+    A run of character maps and word permutations applied as one pass: a single str.translate
+    with the composed table, then at most one split/permute/join with the composed permutation
+    for each word length. The two kinds commute, as the maps never touch whitespace.
+    """
+
+    def __init__(self, table, permutations):
+        self.table = table
+        self.permutations = permutations
+        self.getters = {}
+
+    def getter(self, n):
+        """
+        Composed permutation for words of length n, or None when it leaves them unchanged.
+        """
+        order = list(range(n))
+        for permutation in self.permutations:
+            source = permutation(n)
+            order = [order[i] for i in source]
+        if order == list(range(n)):
+            return None
+        return itemgetter(*order)
+
+    def __call__(self, x):
+        if self.table:
+            x = x.translate(self.table)
+        if not self.permutations:
+            return x
+        getters = self.getters
+        result = []
+        for word in x.split():
+            n = len(word)
+            if n not in getters:
+                getters[n] = self.getter(n)
+            getter = getters[n]
+            result.append(word if getter is None else ''.join(getter(word)))
+        return ' '.join(result)
+
+@lru_cache(maxsize=PIPELINE_CACHE_SIZE)
+def compile_pipeline(transformations):
+    """
+    Compile a tuple of transformations into the stages that undo them, in application order.
+    Consecutive character maps and word permutations fuse into one FusedStage; any other
+    inverse (double_consonants) is a barrier that runs as its own pass.
+    """
+    stages = []
+    table, permutations = {}, []
+    
+    def flush():
+        if table or permutations:
+            stages.append(FusedStage(dict(table), list(permutations)))
+        table.clear()
+        permutations.clear()
     
-    current = transformed_word
     for func in reversed(transformations):
-        current = reverse_funcs[func](current)
+        if func in CHAR_MAP_TABLES:
+            step = CHAR_MAP_TABLES[func]
+            for char in ascii_lowercase + ascii_uppercase:
+                code = ord(char)
+                current = table.get(code, code)
+                mapped = step.get(current, current)
+                if mapped == code:
+                    table.pop(code, None)
+                else:
+                    table[code] = mapped
+        elif func in WORD_PERMUTATIONS:
+            permutations.append(WORD_PERMUTATIONS[func])
+        else:
+            flush()
+            stages.append(REVERSE_FUNCS[func])
+    flush()
+    return stages
+
+def solve_challenge_one(transformations, transformed_word):
+    current = transformed_word
+    if not current.isascii():
+        # swapcase and the word splitting are Unicode-aware: undo step by step
+        for func in reversed(transformations):
+            current = REVERSE_FUNCS[func](current)
+        return current
+    
+    for stage in compile_pipeline(tuple(transformations)):
+        current = stage(current)
     return current
 
-def solve_challenge_two(coordinates):
+def solve_challenge_two_legacy(coordinates):
     coords = [(float(lat), float(lon)) for lat, lon in coordinates]
     center_lat = sum(lat for lat, lon in coords) / len(coords)
     center_lon = sum(lon for lat, lon in coords) / len(coords)
@@ -88,77 +190,167 @@ def solve_challenge_two(coordinates):
     pattern_value = int(len(pattern_coords) * 100)
     return str(pattern_value)
 
+# From this many coordinate pairs on, challenge two runs chunk by chunk, holding one chunk of floats at a time
+STREAM_THRESHOLD = int(os.environ.get('SAFEGUARD_STREAM_THRESHOLD', 200000))
+STREAM_CHUNK_SIZE = int(os.environ.get('SAFEGUARD_STREAM_CHUNK_SIZE', 65536))
+
+def sequential_sum(values, start=0.0):
+    """
+    start + values[0] + values[1] + ... added left to right, as Python's sum() does (np.sum
+    adds pairwise, which rounds differently and could move points across the average).
+    """
+    if len(values) == 0:
+        return start
+    return float(np.cumsum(np.concatenate(([start], values)))[-1])
+
+def squared_distances(coords, center_lat, center_lon):
+    return (coords[:, 0] - center_lat) ** 2 + (coords[:, 1] - center_lon) ** 2
+
+def count_pattern_points(coords):
+    """
+    Number of points no farther (squared) from the centroid than the average, for an N x 2
+    float array.
+    """
+    n = len(coords)
+    center_lat = sequential_sum(coords[:, 0]) / n
+    center_lon = sequential_sum(coords[:, 1]) / n
+    distances = squared_distances(coords, center_lat, center_lon)
+    avg_dist = sequential_sum(distances) / n
+    return int(np.count_nonzero(distances <= avg_dist))
+
+def coordinate_chunks(coordinates, chunk_size):
+    """
+    The decoded coordinate list as successive chunk_size x 2 float arrays.
+    """
+    for start in range(0, len(coordinates), chunk_size):
+        chunk = np.array(coordinates[start:start + chunk_size], dtype=np.float64)
+        if chunk.ndim != 2 or chunk.shape[1] != 2:
+            raise ValueError("Each coordinate must be a [lat, lon] pair")
+        yield chunk
+
+def count_pattern_points_streaming(coordinates, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    count_pattern_points straight from the decoded coordinate list, parsing one chunk at a time
+    so no N-length array is ever held: one pass carries the centroid sums, a second the sum of
+    the distances, and a third counts the points within their average.
+    """
+    n = len(coordinates)
+    sum_lat = sum_lon = 0.0
+    for chunk in coordinate_chunks(coordinates, chunk_size):
+        sum_lat = sequential_sum(chunk[:, 0], sum_lat)
+        sum_lon = sequential_sum(chunk[:, 1], sum_lon)
+    center_lat, center_lon = sum_lat / n, sum_lon / n
+    
+    total = 0.0
+    for chunk in coordinate_chunks(coordinates, chunk_size):
+        total = sequential_sum(squared_distances(chunk, center_lat, center_lon), total)
+    avg_dist = total / n
+    
+    count = 0
+    for chunk in coordinate_chunks(coordinates, chunk_size):
+        count += int(np.count_nonzero(squared_distances(chunk, center_lat, center_lon) <= avg_dist))
+    return count
+
+def solve_challenge_two(coordinates):
+    """
+    Vectorized solve_challenge_two_legacy with the same results. Anything that does not parse
+    into an N x 2 float array goes through the legacy path, which raises the same errors.
+    """
+    try:
+        if len(coordinates) >= STREAM_THRESHOLD:
+            count = count_pattern_points_streaming(coordinates)
+        else:
+            coords = np.array(coordinates, dtype=np.float64)
+            if coords.ndim != 2 or coords.shape[1] != 2 or len(coords) == 0:
+                return solve_challenge_two_legacy(coordinates)
+            count = count_pattern_points(coords)
+    except (TypeError, ValueError):
+        return solve_challenge_two_legacy(coordinates)
+    return str(int(count * 100))
+
+# Decoders for challenge three by CIPHER_TYPE; each takes the payload and returns the plaintext
+CIPHER_DECODERS = {}
+
+def register_cipher(name):
+    """
+    Decorator registering a decoder for a CIPHER_TYPE.
+    """
+    def decorator(func):
+        CIPHER_DECODERS[name] = func
+        return func
+    return decorator
+
+@register_cipher('RAILFENCE')
+def decode_railfence(payload, rails=3):
+    """
+    Undo a rail fence in one linear pass. Over a zigzag cycle of 2 * (rails - 1) positions,
+    rail r holds positions r and cycle - r of every cycle (one of them on the top and bottom
+    rails), so the ciphertext is cut rail by rail and each piece is dealt back with slices.
+    """
+    n = len(payload)
+    cycle = 2 * (rails - 1)
+    if cycle <= 0 or n <= 1:
+        return payload
+    result = [''] * n
+    taken = 0
+    for r in range(min(rails, n)):
+        down = len(range(r, n, cycle))
+        up = len(range(cycle - r, n, cycle)) if 0 < r < rails - 1 else 0
+        piece = payload[taken:taken + down + up]
+        taken += down + up
+        if up:
+            result[r::cycle] = piece[0::2]
+            result[cycle - r::cycle] = piece[1::2]
+        else:
+            result[r::cycle] = piece
+    return ''.join(result)
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+@lru_cache(maxsize=PIPELINE_CACHE_SIZE)
+def keyword_table(keyword):
+    """
+    Translation table from the alphabet keyed by keyword (its distinct letters first, then the
+    rest of the alphabet) back to the plain alphabet.
+    """
+    keyed = keyword.upper() + ALPHABET
+    key = ''.join(sorted(set(keyed), key=keyed.index))
+    return str.maketrans(key, ALPHABET[:len(key)])
+
+@register_cipher('KEYWORD')
+def decode_keyword(payload, keyword="SHADOW"):
+    return payload.upper().translate(keyword_table(keyword))
+
+POLYBIUS = {
+    'A': '11', 'B': '12', 'C': '13', 'D': '14', 'E': '15',
+    'F': '21', 'G': '22', 'H': '23', 'I': '24', 'J': '24', 'K': '25',
+    'L': '31', 'M': '32', 'N': '33', 'O': '34', 'P': '35',
+    'Q': '41', 'R': '42', 'S': '43', 'T': '44', 'U': '45',
+    'V': '51', 'W': '52', 'X': '53', 'Y': '54', 'Z': '55'
+}
+# I and J share a cell; the later entry wins, so '24' decodes to 'J'
+REVERSE_POLYBIUS = {v: k for k, v in POLYBIUS.items()}
+
+@register_cipher('POLYBIUS')
+def decode_polybius(payload):
+    return ''.join([REVERSE_POLYBIUS[payload[i:i+2]] for i in range(0, len(payload), 2)])
+
 def solve_challenge_three(log_entry):
     cipher_type = re.search(r'CIPHER_TYPE: (\w+)', log_entry).group(1)
     payload = re.search(r'ENCRYPTED_PAYLOAD: (\w+)', log_entry).group(1)
     
-    if cipher_type == 'RAILFENCE':
-        n = len(payload)
-        rail = [[None] * n for _ in range(3)]
-        dir_down = None
-        row, col = 0, 0
-        for i in range(n):
-            if row == 0:
-                dir_down = True
-            if row == 2:
-                dir_down = False
-            rail[row][col] = True
-            col += 1
-            row += 1 if dir_down else -1
-        
-        index = 0
-        for i in range(3):
-            for j in range(n):
-                if rail[i][j] and index < n:
-                    rail[i][j] = payload[index]
-                    index += 1
-        
-        result = []
-        row, col = 0, 0
-        for i in range(n):
-            if row == 0:
-                dir_down = True
-            if row == 2:
-                dir_down = False
-            result.append(rail[row][col])
-            col += 1
-            row += 1 if dir_down else -1
-        return ''.join(result)
-    
-    elif cipher_type == 'KEYWORD':
-        keyword = "SHADOW"
-        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        key = ''.join(sorted(set(keyword.upper() + alphabet), key=(keyword.upper() + alphabet).index))
-        decrypted = []
-        for char in payload.upper():
-            if char in key:
-                idx = key.index(char)
-                decrypted.append(alphabet[idx])
-            else:
-                decrypted.append(char)
-        return ''.join(decrypted)
-    
-    elif cipher_type == 'POLYBIUS':
-        polybius = {
-            'A': '11', 'B': '12', 'C': '13', 'D': '14', 'E': '15',
-            'F': '21', 'G': '22', 'H': '23', 'I': '24', 'J': '24', 'K': '25',
-            'L': '31', 'M': '32', 'N': '33', 'O': '34', 'P': '35',
-            'Q': '41', 'R': '42', 'S': '43', 'T': '44', 'U': '45',
-            'V': '51', 'W': '52', 'X': '53', 'Y': '54', 'Z': '55'
-        }
-        reverse_polybius = {v: k for k, v in polybius.items()}
-        chunks = [payload[i:i+2] for i in range(0, len(payload), 2)]
-        return ''.join(reverse_polybius[chunk] for chunk in chunks)
-    
-    return payload
+    decoder = CIPHER_DECODERS.get(cipher_type)
+    if decoder is None:
+        return payload
+    return decoder(payload)
 
 def solve_challenge_four(ch1, ch2, ch3):
     return f"{ch1}_{ch2}_{ch3}"
 
-@app.route('/operation-safeguard', methods=['POST'])
-def operation_safeguard():
-    data = request.get_json()
-    
+def solve_safeguard(data):
+    """
+    All four challenges of one safeguard payload.
+    """
     ch1 = solve_challenge_one(
         data['challenge_one']['transformations'],
         data['challenge_one']['transformed_encrypted_word']
@@ -168,12 +360,61 @@ def operation_safeguard():
     ch3 = solve_challenge_three(data['challenge_three'])
     ch4 = solve_challenge_four(ch1, ch2, ch3)
     
-    return jsonify({
+    return {
         'challenge_one': ch1,
         'challenge_two': ch2,
         'challenge_three': ch3,
         'challenge_four': ch4
-    })
+    }
+
+# Batch mode: payloads fanned out in chunks
+SAFEGUARD_WORKERS = int(os.environ.get('SAFEGUARD_WORKERS', default_workers()))
+SAFEGUARD_CHUNK_SIZE = int(os.environ.get('SAFEGUARD_CHUNK_SIZE', 64))
+SAFEGUARD_PARALLEL_MIN_ITEMS = int(os.environ.get('SAFEGUARD_PARALLEL_MIN_ITEMS', 128))
+safeguard_pool = create_pool(SAFEGUARD_WORKERS)
+
+def solve_safeguard_chunk(payloads):
+    """
+    solve_safeguard for each payload, with a failing payload reported as {"error": ...} instead
+    of failing the others.
+    """
+    results = []
+    for data in payloads:
+        try:
+            results.append(solve_safeguard(data))
+        except Exception as e:
+            results.append({'error': f"{type(e).__name__}: {e}"})
+    return results
+
+def solve_safeguard_batch(payloads):
+    """
+    Results for every payload in input order, on the pool when it is enabled and the batch is
+    big enough to pay for the inter-process round trips.
+    """
+    if safeguard_pool is None or len(payloads) < SAFEGUARD_PARALLEL_MIN_ITEMS:
+        return solve_safeguard_chunk(payloads)
+    
+    chunks = [payloads[i:i + SAFEGUARD_CHUNK_SIZE] for i in range(0, len(payloads), SAFEGUARD_CHUNK_SIZE)]
+    results = []
+    for chunk_results in safeguard_pool.map(solve_safeguard_chunk, chunks):
+        results.extend(chunk_results)
+    return results
+
+@app.route('/operation-safeguard', methods=['POST'])
+def operation_safeguard():
+    data = request.get_json()
+    return jsonify(solve_safeguard(data))
+
+@app.route('/operation-safeguard/batch', methods=['POST'])
+def operation_safeguard_batch():
+    """
+    Solve a list of safeguard payloads. Each entry of the response is the payload's results, or
+    {"error": ...} for a payload that could not be solved.
+    """
+    payloads = request.get_json()
+    if not isinstance(payloads, list):
+        return jsonify({'error': 'Expected a list of payloads'}), 400
+    return jsonify(solve_safeguard_batch(payloads))
 
 if __name__ == '__main__':  
     port = int(os.environ.get('PORT', 5000))  
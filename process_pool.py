@@ -0,0 +1,25 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+def default_workers():
+    """
+    Pool size for an app that configures none. POOL_WORKERS sets it for every app at once;
+    otherwise it is half of this process's share of the CPUs it may run on, WEB_CONCURRENCY
+    (as gunicorn reads it) being the number of app processes sharing them. The other half is
+    left to request handling and to other apps on the box.
+    """
+    if 'POOL_WORKERS' in os.environ:
+        return int(os.environ['POOL_WORKERS'])
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    share = cpus // max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+    return max(1, share // 2)
+
+def create_pool(workers):
+    """
+    A process pool of the given size, created once at startup, or None (run serially) for one
+    worker or fewer.
+    """
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from flask import jsonify
+import threading
+import time
+import uuid
+
+class SessionStore:
+    """
+    Live sessions by id, kept in process memory, so a session's calls must reach the worker
+    that created it. A session idle for longer than ttl_seconds expires, and adding one to a
+    store holding max_sessions evicts the least recently used.
+    """
+
+    def __init__(self, max_sessions, ttl_seconds):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()  # session id -> (session, last use), least recent first
+
+    def expire(self, now):
+        while self.sessions:
+            session_id, (_, last_use) = next(iter(self.sessions.items()))
+            if now - last_use <= self.ttl_seconds:
+                break
+            del self.sessions[session_id]
+
+    def add(self, session):
+        """
+        Store a new session and return its id.
+        """
+        session_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self.lock:
+            self.expire(now)
+            while self.sessions and len(self.sessions) >= self.max_sessions:
+                self.sessions.popitem(last=False)
+            self.sessions[session_id] = (session, now)
+        return session_id
+
+    def get(self, session_id):
+        """
+        The live session with this id, or None; counts as a use.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.expire(now)
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                return None
+            self.sessions[session_id] = (entry[0], now)
+            self.sessions.move_to_end(session_id)
+            return entry[0]
+
+    def pop(self, session_id):
+        with self.lock:
+            entry = self.sessions.pop(session_id, None)
+        return None if entry is None else entry[0]
+
+    def add_delete_route(self, app, rule):
+        """
+        Register DELETE on rule (which takes a <session_id>) to drop a session.
+        """
+        def delete_session(session_id):
+            if self.pop(session_id) is None:
+                return jsonify({'error': f"Unknown session '{session_id}'"}), 404
+            return jsonify({'sessionId': session_id, 'deleted': True})
+
+        app.add_url_rule(rule, 'delete_session', delete_session, methods=['DELETE'])
@@ -0,0 +1,89 @@
+import math
+import random
+import unittest
+
+import ink_archive
+
+def reference_best_cycle(goods, rates):
+    """
+    The original scalar find_best_cycle: one in-place Floyd-Warshall over Python lists, a cycle
+    read back along next_node for every negative diagonal entry, the first strictly best kept.
+    """
+    n = len(goods)
+    dist = [[-math.log(rates[i][j]) if rates[i][j] > 0 else math.inf for j in range(n)] for i in range(n)]
+    next_node = [[j if dist[i][j] < math.inf else -1 for j in range(n)] for i in range(n)]
+    for k in range(n):
+        for i in range(n):
+            for j in range(n):
+                if dist[i][k] + dist[k][j] < dist[i][j]:
+                    dist[i][j] = dist[i][k] + dist[k][j]
+                    next_node[i][j] = next_node[i][k]
+
+    best_cycle, best_gain = None, 0.0
+    for i in range(n):
+        if dist[i][i] < 0:
+            cur, visited = i, set()
+            while cur not in visited:
+                visited.add(cur)
+                cur = next_node[cur][i]
+            cycle_nodes = [cur]
+            next_val = next_node[cur][i]
+            while next_val != cur:
+                cycle_nodes.append(next_val)
+                next_val = next_node[next_val][i]
+            cycle_nodes.append(cur)
+            product = 1.0
+            for u, v in zip(cycle_nodes, cycle_nodes[1:]):
+                product *= rates[u][v]
+            if product - 1.0 > best_gain:
+                best_cycle, best_gain = [goods[idx] for idx in cycle_nodes], product - 1.0
+    return best_cycle, best_gain
+
+class FindBestCycleTest(unittest.TestCase):
+
+    def test_cycle_behind_break_even_two_cycle(self):
+        # Next hops lead into the 0 <-> 1 two-cycle (product 1.0) before the profitable loop
+        goods = ['g0', 'g1', 'g2']
+        rates = [[1.0, 0.5, 1.05], [2.0, 1.0, 1.0], [0.9, 1.25, 1.0]]
+        self.assertEqual(ink_archive.find_best_cycle(goods, rates), (['g0', 'g2', 'g1', 'g0'], 1.625))
+
+    def test_matches_scalar_floyd_warshall(self):
+        rng = random.Random(22)
+        for _ in range(2000):
+            n = rng.randint(2, 7)
+            rates = [[rng.choice([1.0, 1.0, 1.1]) if i == j else rng.choice([0, 1.0, round(rng.uniform(0.5, 2), 3)])
+                      for j in range(n)] for i in range(n)]
+            goods = [f'g{i}' for i in range(n)]
+            self.assertEqual(ink_archive.find_best_cycle(goods, rates), reference_best_cycle(goods, rates), rates)
+
+    def test_top_k_shares_the_ranked_cycles(self):
+        client = ink_archive.app.test_client()
+        challenge = {'goods': ['g0', 'g1', 'g2'], 'rates': [[1.0, 0.5, 1.05], [2.0, 1.0, 1.0], [0.9, 1.25, 1.0]], 'topK': 2}
+        results = client.post('/The-Ink-Archive', json={'challenges': [challenge, challenge]}).get_json()
+        for result in results:
+            self.assertEqual(result['path'], ['g0', 'g2', 'g1', 'g0'])
+            self.assertEqual(result['cycles'][0], {'path': result['path'], 'gain': result['gain']})
+
+class MarketSessionTest(unittest.TestCase):
+
+    def test_new_arbitrage_under_existing_arbitrage(self):
+        session = ink_archive.MarketSession(['a', 'b', 'c'], [[1, 0.5, 2], [2, 1, 0], [1, 0, 1]])
+        self.assertEqual(session.best_cycles()[0], (['a', 'c', 'a'], 1.0))
+        session.update_rates([(0, 1, 2.0)])
+        self.assertEqual(session.best_cycles()[0], (['a', 'b', 'a'], 3.0))
+
+    def test_matches_fresh_pass_after_updates(self):
+        rng = random.Random(24)
+        def random_rate():
+            return rng.choice([0, 1.0, 0.5, 2.0, round(rng.uniform(0.5, 1.5), 3)])
+        for _ in range(200):
+            n = rng.randint(2, 7)
+            goods = [f'g{i}' for i in range(n)]
+            session = ink_archive.MarketSession(goods, [[1.0 if i == j else random_rate() for j in range(n)] for i in range(n)])
+            for _ in range(15):
+                u, v = rng.sample(range(n), 2)
+                session.update_rates([(u, v, random_rate())])
+                self.assertEqual(session.best_cycles(), ink_archive.find_arbitrage_cycles(goods, session.rates))
+
+if __name__ == '__main__':
+    unittest.main()
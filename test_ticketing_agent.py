@@ -0,0 +1,49 @@
+import math
+import random
+import unittest
+
+import ticketing_agent
+
+# Coordinate offsets on and just around the 1 and 2 latency radii, where float rounding decides the tier
+BOUNDARY_OFFSETS = [0, 1, 2, math.sqrt(2), math.sqrt(3), 0.9999999999999999, 2.0000000000000004, 1e-17]
+
+def random_coordinate(rng):
+    if rng.random() < 0.5:
+        return rng.choice(BOUNDARY_OFFSETS) * rng.choice([1, -1]) + rng.randint(-2, 2)
+    return rng.choice([rng.randint(-4, 4), rng.uniform(-4, 4)])
+
+class KernelAgreementTest(unittest.TestCase):
+
+    def setUp(self):
+        # Tiles smaller than the inputs so the matrix kernel crosses tile edges
+        self.tiles = ticketing_agent.TILE_CUSTOMERS, ticketing_agent.TILE_CONCERTS
+        ticketing_agent.TILE_CUSTOMERS, ticketing_agent.TILE_CONCERTS = 3, 2
+        self.client = ticketing_agent.app.test_client()
+
+    def tearDown(self):
+        ticketing_agent.TILE_CUSTOMERS, ticketing_agent.TILE_CONCERTS = self.tiles
+
+    def post(self, data, kernel):
+        response = self.client.post(f'/ticketing-agent?kernel={kernel}', json=data)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_matrix_grid_and_scan_agree(self):
+        rng = random.Random(20)
+        cards = ['c1', 'c2', 'c3']
+        for _ in range(1000):
+            concerts = [{'name': rng.choice('ABCDE'), 'booking_center_location': [random_coordinate(rng), random_coordinate(rng)]}
+                        for _ in range(rng.randint(0, 8))]
+            customers = [{'name': f'p{i}', 'vip_status': rng.random() < 0.5, 'credit_card': rng.choice(cards),
+                          'location': [random_coordinate(rng), random_coordinate(rng)]}
+                         for i in range(rng.randint(0, 12))]
+            priority = {card: rng.choice('ABCDEF') for card in cards if rng.random() < 0.6}
+            data = {'customers': customers, 'concerts': concerts, 'priority': priority}
+
+            expected = {customer['name']: ticketing_agent.scan_best_concert(customer['location'], customer['credit_card'], concerts, priority)
+                        for customer in customers}
+            self.assertEqual(self.post(data, 'matrix'), expected, data)
+            self.assertEqual(self.post(data, 'grid'), expected, data)
+
+if __name__ == '__main__':
+    unittest.main()
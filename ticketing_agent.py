@@ -1,5 +1,7 @@
 from flask import Flask, request, jsonify
 import math
+import os
+import numpy as np
 
 app = Flask(__name__)
 
@@ -16,6 +18,212 @@ def get_latency_points(distance):
     else:
         return 0
 
+def sqrt_threshold(limit):
+    """
+    Largest float x with math.sqrt(x) <= limit, so that comparing a squared distance against it
+    gives exactly the same answer as comparing its square root against limit.
+    """
+    x = float(limit * limit)
+    while math.sqrt(x) > limit:
+        x = math.nextafter(x, -math.inf)
+    while math.sqrt(math.nextafter(x, math.inf)) <= limit:
+        x = math.nextafter(x, math.inf)
+    return x
+
+# Squared-distance bounds of the latency tiers in get_latency_points
+LATENCY_TIERS = ((sqrt_threshold(1), 30), (sqrt_threshold(2), 20))
+LATENCY_RADIUS = 2
+
+# Grid cells a hair wider than the latency radius: every concert within the radius, after
+# float rounding, is in the customer's cell or one of its 8 neighbours. Coordinates beyond
+# GRID_LIMIT (or not plain numbers) are not gridded, as cell rounding is no longer reliable there.
+GRID_CELL = LATENCY_RADIUS * (1 + 2 ** -20)
+GRID_LIMIT = 2 ** 31
+
+def grid_cell(location):
+    """
+    Grid cell of a location, or None when it has to be handled without the grid.
+    """
+    if not isinstance(location, (list, tuple)) or len(location) != 2:
+        return None
+    x, y = location
+    if type(x) not in (int, float) or type(y) not in (int, float):
+        return None
+    if not (-GRID_LIMIT < x < GRID_LIMIT and -GRID_LIMIT < y < GRID_LIMIT):
+        return None
+    return math.floor(x / GRID_CELL), math.floor(y / GRID_CELL)
+
+class ConcertIndex:
+    """
+    Concerts indexed for customer matching: a uniform grid over booking_center_location, the
+    concerts that could not be gridded, and concert positions by name for priority cards.
+    """
+
+    def __init__(self, concerts):
+        self.concerts = concerts
+        self.cells = {}
+        self.ungridded = []
+        self.by_name = {}
+        for i, concert in enumerate(concerts):
+            cell = grid_cell(concert['booking_center_location'])
+            if cell is None:
+                self.ungridded.append(i)
+            else:
+                self.cells.setdefault(cell, []).append(i)
+            name = concert['name']
+            try:
+                self.by_name.setdefault(name, []).append(i)
+            except TypeError:
+                pass  # unhashable names can only score through the scan fallback
+
+    def best_concert(self, customer_loc, credit_card, priority):
+        """
+        The concert calculate_distance scoring picks for a customer: the highest score, first
+        concert on ties. Only concerts within the latency radius or named on the customer's
+        priority card can score above the rest; when none does, the first concert wins.
+        """
+        cell = grid_cell(customer_loc)
+        if cell is None:
+            return scan_best_concert(customer_loc, credit_card, self.concerts, priority)
+        
+        bonus = {}
+        if credit_card in priority:
+            try:
+                for i in self.by_name.get(priority[credit_card], ()):
+                    bonus[i] = 50
+            except TypeError:
+                pass
+        
+        x1, y1 = customer_loc
+        best_index, best_points = 0, 0
+        cx, cy = cell
+        candidates = [self.cells.get((cx + dx, cy + dy), ()) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        candidates.append(bonus)
+        for indices in candidates:
+            for i in indices:
+                x2, y2 = self.concerts[i]['booking_center_location']
+                squared = (x2 - x1) ** 2 + (y2 - y1) ** 2
+                points = bonus.get(i, 0)
+                for bound, tier_points in LATENCY_TIERS:
+                    if squared <= bound:
+                        points += tier_points
+                        break
+                if points > best_points or (points == best_points and i < best_index):
+                    best_index, best_points = i, points
+        for i in self.ungridded:
+            concert = self.concerts[i]
+            points = bonus.get(i, 0) + get_latency_points(calculate_distance(customer_loc, concert['booking_center_location']))
+            if points > best_points or (points == best_points and i < best_index):
+                best_index, best_points = i, points
+        return self.concerts[best_index]['name']
+
+def scan_best_concert(customer_loc, credit_card, concerts, priority):
+    """
+    Score every concert for one customer and return the first with the highest score.
+    """
+    max_points = -1
+    best_concert = None
+    
+    for concert in concerts:
+        concert_name = concert['name']
+        concert_loc = concert['booking_center_location']
+        
+        # Calculate points
+        points = 0
+        if credit_card in priority and priority[credit_card] == concert_name:
+            points += 50
+        distance = calculate_distance(customer_loc, concert_loc)
+        points += get_latency_points(distance)
+        
+        if points > max_points:
+            max_points = points
+            best_concert = concert_name
+    
+    return best_concert
+
+# Matching kernels: 'grid' scores each customer against nearby concerts through ConcertIndex,
+# 'matrix' scores customer x concert tiles with array operations
+KERNELS = ('grid', 'matrix')
+DEFAULT_KERNEL = os.environ.get('TICKETING_KERNEL', 'grid')
+TILE_CUSTOMERS = int(os.environ.get('TICKETING_TILE_CUSTOMERS', 1024))
+TILE_CONCERTS = int(os.environ.get('TICKETING_TILE_CONCERTS', 4096))
+# Integer coordinates are only converted to float64 exactly below this magnitude
+EXACT_LIMIT = 2 ** 52
+
+def location_array(locations):
+    """
+    N x 2 float64 array of locations, or None when they are not all pairs of finite numbers small
+    enough for float64 arithmetic to match the scalar path.
+    """
+    try:
+        array = np.array(locations)
+    except (TypeError, ValueError):
+        return None
+    if array.ndim != 2 or array.shape[1] != 2 or array.dtype.kind not in 'biuf':
+        return None
+    array = array.astype(np.float64)
+    if not (np.abs(array) < EXACT_LIMIT).all():
+        return None
+    return array
+
+def best_concerts_matrix(locations, credit_cards, vip_statuses, concerts, priority):
+    """
+    The concert picked for each customer, scoring customer x concert tiles at once: squared
+    distances against LATENCY_TIERS, priority and VIP bonuses as broadcast additions, and the
+    first maximum kept per customer across concert tiles. Returns None when the input does not
+    fit the array path.
+    """
+    customer_locs = location_array(locations)
+    concert_locs = location_array([concert['booking_center_location'] for concert in concerts])
+    if customer_locs is None or concert_locs is None:
+        return None
+    
+    # Priority bonus: a customer's card names a concert when the name ids match (-1 never does)
+    name_ids = {}
+    try:
+        concert_name_ids = np.array([name_ids.setdefault(concert['name'], len(name_ids)) for concert in concerts])
+    except TypeError:
+        return None
+    targets = []
+    for credit_card in credit_cards:
+        target = -1
+        if credit_card in priority:
+            try:
+                target = name_ids.get(priority[credit_card], -1)
+            except TypeError:
+                pass
+        targets.append(target)
+    targets = np.array(targets, dtype=np.int64)
+    has_targets = bool((targets >= 0).any())
+    vip_bonus = np.array([100 if vip_status else 0 for vip_status in vip_statuses], dtype=np.int32)
+    (near, near_points), (far, far_points) = LATENCY_TIERS
+    
+    n, k = len(customer_locs), len(concert_locs)
+    best_index = np.zeros(n, dtype=np.int64)
+    best_points = np.full(n, -1, dtype=np.int32)
+    for row in range(0, n, TILE_CUSTOMERS):
+        rows = slice(row, row + TILE_CUSTOMERS)
+        x1 = customer_locs[rows, 0, None]
+        y1 = customer_locs[rows, 1, None]
+        tile_best_index = best_index[rows]
+        tile_best_points = best_points[rows]
+        for col in range(0, k, TILE_CONCERTS):
+            cols = slice(col, col + TILE_CONCERTS)
+            squared = (concert_locs[cols, 0] - x1) ** 2 + (concert_locs[cols, 1] - y1) ** 2
+            points = np.where(squared <= far, far_points, 0).astype(np.int32)
+            points[squared <= near] = near_points
+            points += vip_bonus[rows, None]
+            if has_targets:
+                points += 50 * (concert_name_ids[cols] == targets[rows, None])
+            first_max = points.argmax(axis=1)
+            max_points = points[np.arange(len(points)), first_max]
+            # Strictly better only: on ties the earlier tile (lower concert index) keeps the pick
+            better = max_points > tile_best_points
+            tile_best_index[better] = first_max[better] + col
+            tile_best_points[better] = max_points[better]
+    
+    return [concerts[i]['name'] for i in best_index.tolist()]
+
 @app.route('/ticketing-agent', methods=['POST'])
 def ticketing_agent():
     if request.headers.get('Content-Type') != 'application/json':
@@ -26,36 +234,29 @@ def ticketing_agent():
     concerts = data.get('concerts', [])
     priority = data.get('priority', {})
     
-    result = {}
+    kernel = request.args.get('kernel', DEFAULT_KERNEL)
+    if kernel not in KERNELS:
+        return jsonify({"error": f"Unknown kernel '{kernel}', expected one of {list(KERNELS)}"}), 400
     
+    names, vip_statuses, locations, credit_cards = [], [], [], []
     for customer in customers:
-        customer_name = customer['name']
-        vip_status = customer['vip_status']
-        customer_loc = customer['location']
-        credit_card = customer['credit_card']
-        
-        max_points = -1
-        best_concert = None
-        
-        for concert in concerts:
-            concert_name = concert['name']
-            concert_loc = concert['booking_center_location']
-            
-            # Calculate points
-            points = 0
-            if vip_status:
-                points += 100
-            if credit_card in priority and priority[credit_card] == concert_name:
-                points += 50
-            distance = calculate_distance(customer_loc, concert_loc)
-            points += get_latency_points(distance)
-            
-            if points > max_points:
-                max_points = points
-                best_concert = concert_name
-        
-        result[customer_name] = best_concert
+        names.append(customer['name'])
+        vip_statuses.append(customer['vip_status'])
+        locations.append(customer['location'])
+        credit_cards.append(customer['credit_card'])
+    
+    best = None
+    if not concerts:
+        best = [None] * len(names)
+    elif kernel == 'matrix' and names:
+        best = best_concerts_matrix(locations, credit_cards, vip_statuses, concerts, priority)
+    if best is None:
+        # VIP status adds the same 100 points to every concert, so the grid never needs it
+        index = ConcertIndex(concerts)
+        best = [index.best_concert(customer_loc, credit_card, priority)
+                for customer_loc, credit_card in zip(locations, credit_cards)]
     
+    result = dict(zip(names, best))
     return jsonify(result), 200, {'Content-Type': 'application/json'}
 
 if __name__ == '__main__':